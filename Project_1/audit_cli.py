@@ -0,0 +1,108 @@
+"""Headless batch runner for the site auditor.
+
+Example (e.g. from cron):
+    python Project_1/audit_cli.py --urls-file domains.txt --output-dir reports --sites 8 --pages-in-flight 48
+"""
+import argparse
+import os
+import sys
+
+# Allow running from the repository root as well as from Project_1
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawl_store import CRAWL_STATE_DIR, site_key
+from crawler import CrawlConfig, parse_path_quotas
+from site_audit import audit_sites, normalize_start_url, write_metrics_file, write_report
+
+
+def read_start_urls(args):
+    urls = list(args.urls)
+    if args.urls_file:
+        with open(args.urls_file, encoding="utf-8") as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    # Keep order, drop repeats (including ones that only differ by a trailing slash)
+    unique = {}
+    for url in map(normalize_start_url, urls):
+        unique.setdefault(site_key(url), url)
+    return list(unique.values())
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Crawl and SEO-audit one or more sites without the Streamlit UI.")
+    parser.add_argument("urls", nargs="*", help="Start URLs (homepages) to audit")
+    parser.add_argument("--urls-file", help="Text file with one start URL per line")
+    parser.add_argument("--output-dir", default="audit_reports", help="Directory for the per-site JSON reports")
+    parser.add_argument("--state-dir", default=CRAWL_STATE_DIR, help="Directory for resumable crawl state")
+    parser.add_argument("--sites", type=int, default=4, help="Sites crawled at the same time")
+    parser.add_argument("--pages-in-flight", type=int, default=32, help="Global cap on pages in flight across all sites")
+    parser.add_argument("--concurrency", type=int, default=8, help="Pages in flight per site")
+    parser.add_argument("--per-host", type=int, default=4, help="Parallel requests per host")
+    parser.add_argument("--max-pages", type=int, default=None, help="Stop discovering URLs after this many per site")
+    parser.add_argument("--max-depth", type=int, default=None, help="Link hops from the homepage to crawl")
+    parser.add_argument("--quota", action="append", default=[], metavar="PATTERN=LIMIT",
+                        help="Cap URLs whose path matches a glob, e.g. --quota '/search*=50' (repeatable)")
+    parser.add_argument("--keep-param", action="append", default=[], metavar="NAME",
+                        help="Query parameter that selects different content, e.g. page (repeatable); others are dropped")
+    parser.add_argument("--incremental", action="store_true", help="Reuse reports of pages unchanged since the last run")
+    parser.add_argument("--no-sitemaps", action="store_true", help="Discover pages by following links only")
+    parser.add_argument("--fresh", action="store_true", help="Ignore interrupted crawls instead of resuming them")
+    parser.add_argument("--quiet", action="store_true", help="Only print per-site results")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    start_urls = read_start_urls(args)
+    if not start_urls:
+        build_parser().error("no start URLs given")
+
+    try:
+        path_quotas = parse_path_quotas(args.quota)
+    except ValueError as e:
+        build_parser().error(str(e))
+
+    config = CrawlConfig(
+        max_concurrency=args.concurrency,
+        per_host_concurrency=args.per_host,
+        max_pages=args.max_pages,
+        max_depth=args.max_depth,
+        path_quotas=path_quotas,
+        keep_query_params=tuple(args.keep_param),
+        incremental=args.incremental,
+        use_sitemaps=not args.no_sitemaps,
+    )
+
+    def on_progress(progress):
+        if not args.quiet and not progress.finished:
+            print(f"[{progress.start_url}] {progress.pages_done}/{progress.pages_discovered} {progress.current_url}",
+                  file=sys.stderr)
+
+    failures = 0
+
+    def on_result(result):
+        nonlocal failures
+        if result.error:
+            failures += 1
+            print(f"❌ {result.start_url}: {result.error}")
+            return
+        path = write_report(result, args.output_dir)
+        write_metrics_file(result, args.output_dir)
+        print(f"✅ {result.start_url}: {len(result.reports)} pages in {result.metrics.get('elapsed_seconds')}s "
+              f"({result.metrics.get('pages_per_second')} pages/s) -> {path}")
+
+    audit_sites(
+        start_urls,
+        config=config,
+        max_sites_in_parallel=args.sites,
+        max_pages_in_flight=args.pages_in_flight,
+        resume=not args.fresh,
+        progress_callback=on_progress,
+        result_callback=on_result,
+        state_dir=args.state_dir,
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""Offline crawler benchmark against a local synthetic site.
+
+Starts an HTTP server (in a child process) that generates a site of any size and shape,
+crawls it with the real engine and audit, and reports pages/sec, peak RSS and the
+requests the server saw. Nothing leaves the machine.
+
+Example:
+    python Project_1/benchmark.py --pages 2000 --shape random --latency-ms 30 --error-rate 0.02 --output bench.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import Counter
+from dataclasses import asdict, dataclass
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Allow running from the repository root as well as from Project_1
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SHAPES = ["tree", "chain", "random", "hub"]
+LOREM = ("search engine optimization crawler audit content page template product category "
+         "service guide article review price shipping support contact about team blog news").split()
+
+
+# --- Synthetic Site ---
+@dataclass
+class SiteShape:
+    pages: int = 500
+    shape: str = "tree"            # tree, chain, random or hub (home links to every page)
+    links_per_page: int = 5
+    page_kb: int = 20              # approximate HTML size per page
+    images_per_page: int = 3
+    image_pool: int = 50           # distinct images shared across pages
+    image_kb: int = 80
+    heavy_image_rate: float = 0.05  # fraction of the image pool served above the heavy threshold
+    latency_ms: float = 20.0
+    jitter: float = 0.5            # +/- fraction of latency_ms
+    error_rate: float = 0.02       # fraction of pages answering 500
+    broken_link_rate: float = 0.02  # fraction of pages linking to a 404
+    duplicate_rate: float = 0.1    # fraction of pages rendered from a shared duplicate template
+    templates: int = 3
+    sitemap: bool = True
+    seed: int = 42
+
+
+class SyntheticSite:
+    """Deterministic page generator: the same shape and seed always give the same site."""
+
+    def __init__(self, shape: SiteShape):
+        self.shape = shape
+
+    def _rng(self, page_id):
+        return random.Random(self.shape.seed * 1_000_003 + page_id)
+
+    def path(self, page_id):
+        return "/" if page_id == 0 else f"/section-{page_id % 10}/page-{page_id}"
+
+    def page_id(self, path):
+        if path == "/":
+            return 0
+        try:
+            page_id = int(path.rsplit("-", 1)[1])
+        except (IndexError, ValueError):
+            return None
+        return page_id if 0 < page_id < self.shape.pages and path == self.path(page_id) else None
+
+    def links(self, page_id):
+        s, rng = self.shape, self._rng(page_id)
+        k = s.links_per_page
+        if s.shape == "chain":
+            targets = [page_id + 1]
+        elif s.shape == "random":
+            targets = [rng.randrange(s.pages) for _ in range(k)]
+        elif s.shape == "hub":
+            targets = range(1, s.pages) if page_id == 0 else [rng.randrange(s.pages) for _ in range(k)]
+        else:
+            targets = range(page_id * k + 1, page_id * k + k + 1)
+        links = [self.path(t) for t in targets if 0 <= t < s.pages and t != page_id]
+        if page_id:
+            links.append(self.path(0))
+        if rng.random() < s.broken_link_rate:
+            links.append(f"/missing-{page_id}")
+        return links
+
+    def is_error(self, page_id):
+        return page_id != 0 and self._rng(page_id).random() < self.shape.error_rate
+
+    def image_bytes(self, image_id):
+        heavy = random.Random(self.shape.seed + image_id).random() < self.shape.heavy_image_rate
+        return (400 if heavy else self.shape.image_kb) * 1024
+
+    def html(self, page_id):
+        s, rng = self.shape, self._rng(page_id)
+        duplicate = page_id != 0 and rng.random() < s.duplicate_rate
+        text_rng = random.Random(rng.randrange(s.templates)) if duplicate else rng
+        title = f"Template {page_id % s.templates}" if duplicate else f"Page {page_id}"
+        words_needed = s.page_kb * 1024 // 8
+        text = " ".join(text_rng.choice(LOREM) for _ in range(words_needed))
+        # Every other image lacks alt text
+        images = "".join(
+            f'<img src="/img/{rng.randrange(s.image_pool)}.jpg"{alt}>'
+            for alt in ('' if i % 2 else ' alt="image"' for i in range(s.images_per_page))
+        )
+        links = "".join(f'<a href="{href}">link {n}</a>' for n, href in enumerate(self.links(page_id)))
+        return (
+            f"<html><head><title>{title}</title>"
+            f'<meta name="description" content="Description of {title}"></head>'
+            f"<body><h1>{title}</h1>{images}<p>{text}</p><nav>{links}</nav></body></html>"
+        )
+
+    def sitemap(self, base_url):
+        entries = "".join(f"<url><loc>{base_url}{self.path(i)}</loc></url>" for i in range(self.shape.pages))
+        return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+
+
+def _make_handler(site, requests_seen, lock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection pooling is measured too
+
+        def log_message(self, *args):
+            pass
+
+        def _count(self, kind):
+            with lock:
+                requests_seen[f"{self.command} {kind}"] += 1
+
+        def _send(self, status, body=b"", content_type="text/html; charset=utf-8", length=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body) if length is None else length))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _delay(self):
+            shape = site.shape
+            if shape.latency_ms:
+                time.sleep(shape.latency_ms / 1000 * (1 + shape.jitter * (2 * random.random() - 1)))
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/__stats":
+                with lock:
+                    return self._send(200, json.dumps(dict(requests_seen)).encode(), "application/json")
+            self._delay()
+            if path == "/robots.txt":
+                self._count("robots")
+                sitemap = f"Sitemap: http://{self.headers['Host']}/sitemap.xml\n" if site.shape.sitemap else ""
+                return self._send(200, f"User-agent: *\nDisallow: /private\n{sitemap}".encode(), "text/plain")
+            if path == "/sitemap.xml":
+                self._count("sitemap")
+                if not site.shape.sitemap:
+                    return self._send(404)
+                return self._send(200, site.sitemap(f"http://{self.headers['Host']}").encode(), "application/xml")
+            if path.startswith("/img/"):
+                self._count("image")
+                try:
+                    image_id = int(path[5:].split(".")[0])
+                except ValueError:
+                    return self._send(404)
+                size = site.image_bytes(image_id)
+                body = b"" if self.command == "HEAD" else b"\0" * size
+                return self._send(200, body, "image/jpeg", length=size)
+            page_id = site.page_id(path.rstrip("/") or "/")
+            self._count("page")
+            if page_id is None:
+                return self._send(404, b"<html><body>Not found</body></html>")
+            if site.is_error(page_id):
+                return self._send(500, b"<html><body>Server error</body></html>")
+            return self._send(200, site.html(page_id).encode())
+
+        do_HEAD = do_GET
+
+    return Handler
+
+
+def _serve(shape, port, ready):
+    site = SyntheticSite(shape)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(site, Counter(), threading.Lock()))
+    server.daemon_threads = True
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_server(shape, port=0):
+    """Run the synthetic site in a child process so its memory and CPU don't count against the crawler."""
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(shape, port, ready), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{ready.get(timeout=10)}"
+
+
+def server_requests(base_url):
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.load(response)
+
+
+# --- Measurements ---
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_crawl_benchmark(base_url, config, render_mode="static", state_dir=None):
+    from crawl_store import CrawlStore
+    from crawler import CrawlEngine
+    from helpers import get_rendered_html
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = CrawlStore.for_site(base_url, state_dir or tmp_dir)
+        store.start(base_url)
+        engine = CrawlEngine(base_url + "/", config=config, store=store,
+                             fetch=partial(get_rendered_html, mode=render_mode))
+        started = time.perf_counter()
+        try:
+            engine.run()
+        finally:
+            store.close()
+        elapsed = time.perf_counter() - started
+    return {
+        "pages": len(engine.reports),
+        "elapsed_seconds": round(elapsed, 3),
+        "pages_per_second": round(len(engine.reports) / elapsed, 2) if elapsed else 0.0,
+        "blocked": len(engine.blocked_urls),
+        "stages": engine.metrics.summary()["stages"],
+    }
+
+
+def run_audit_benchmark(base_url, site, pages):
+    """full_seo_audit alone on pre-fetched HTML, with shared checkers as in a crawl."""
+    from fingerprint import ContentFingerprintIndex
+    from helpers import full_seo_audit
+    from hybrid_fetch import fetch_static_html
+    from link_checker import LinkChecker
+    from page_parser import parse_page
+    from robots import RobotsCache
+
+    urls = [base_url + site.path(i) for i in range(min(pages, site.shape.pages)) if not site.is_error(i)]
+    documents = [(url, fetch_static_html(url)) for url in urls]
+    link_checker, image_checker, robots_cache = LinkChecker(), LinkChecker(), RobotsCache()
+    titles, descs, index = {}, {}, ContentFingerprintIndex()
+    started = time.perf_counter()
+    try:
+        for url, html in documents:
+            full_seo_audit(url, titles, descs, index, html, link_checker=link_checker,
+                           robots_cache=robots_cache, page=parse_page(html), image_checker=image_checker)
+    finally:
+        link_checker.shutdown()
+        image_checker.shutdown()
+    elapsed = time.perf_counter() - started
+    return {
+        "pages": len(documents),
+        "elapsed_seconds": round(elapsed, 3),
+        "pages_per_second": round(len(documents) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+# --- CLI ---
+def build_parser():
+    defaults = SiteShape()
+    parser = argparse.ArgumentParser(description="Benchmark the crawler offline against a synthetic local site.")
+    parser.add_argument("--pages", type=int, default=defaults.pages)
+    parser.add_argument("--shape", choices=SHAPES, default=defaults.shape, help="Link graph shape")
+    parser.add_argument("--links", type=int, default=defaults.links_per_page, help="Links per page")
+    parser.add_argument("--page-kb", type=int, default=defaults.page_kb)
+    parser.add_argument("--images", type=int, default=defaults.images_per_page, help="Images per page")
+    parser.add_argument("--image-pool", type=int, default=defaults.image_pool, help="Distinct images across the site")
+    parser.add_argument("--image-kb", type=int, default=defaults.image_kb)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Artificial server latency")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of pages answering 500")
+    parser.add_argument("--broken-link-rate", type=float, default=defaults.broken_link_rate)
+    parser.add_argument("--duplicate-rate", type=float, default=defaults.duplicate_rate)
+    parser.add_argument("--templates", type=int, default=defaults.templates, help="Distinct duplicate templates")
+    parser.add_argument("--no-sitemap", action="store_true")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--mode", choices=["crawl", "audit"], default="crawl",
+                        help="Full crawl, or full_seo_audit alone on pre-fetched pages")
+    parser.add_argument("--render-mode", choices=["static", "hybrid", "browser"], default="static")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=8)
+    parser.add_argument("--polite", action="store_true",
+                        help="Keep the default per-host rate limits (otherwise they are lifted to measure raw throughput)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    shape = SiteShape(
+        pages=args.pages, shape=args.shape, links_per_page=args.links, page_kb=args.page_kb,
+        images_per_page=args.images, image_pool=args.image_pool, image_kb=args.image_kb,
+        latency_ms=args.latency_ms, jitter=args.jitter, error_rate=args.error_rate,
+        broken_link_rate=args.broken_link_rate, duplicate_rate=args.duplicate_rate,
+        templates=args.templates, sitemap=not args.no_sitemap, seed=args.seed,
+    )
+    server, base_url = start_server(shape)
+    try:
+        from crawler import CrawlConfig
+        from rate_limiter import host_rate_limiter
+
+        if not args.polite:
+            host_rate_limiter.initial_rate = host_rate_limiter.max_rate = 1_000_000
+        if args.mode == "crawl":
+            config = CrawlConfig(max_concurrency=args.concurrency, per_host_concurrency=args.per_host)
+            result = run_crawl_benchmark(base_url, config, args.render_mode)
+        else:
+            result = run_audit_benchmark(base_url, SyntheticSite(shape), args.pages)
+        result["peak_rss_mb"] = peak_rss_mb()
+        result["server_requests"] = server_requests(base_url)
+    finally:
+        server.terminate()
+
+    output = {"site": asdict(shape), "mode": args.mode, "render_mode": args.render_mode,
+              "concurrency": args.concurrency, "per_host": args.per_host, "polite": args.polite, **result}
+    print(f"{result['pages']} pages in {result['elapsed_seconds']}s -> {result['pages_per_second']} pages/s, "
+          f"peak RSS {result['peak_rss_mb']} MB")
+    for kind, count in sorted(result["server_requests"].items()):
+        print(f"  {kind:<14} {count}")
+    for stage, stats in result.get("stages", {}).items():
+        print(f"  {stage:<16} total {stats['total_seconds']:>8}s  p50 {stats['p50']:>7}s  p95 {stats['p95']:>7}s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import atexit
+import queue
+import threading
+import time
+
+import undetected_chromedriver as uc
+
+from crawl_metrics import timed
+
+
+def _chrome_options():
+    # Set Chrome options for headless rendering
+    options = uc.ChromeOptions()
+    options.add_argument("--headless")  # Run headless
+    options.add_argument("--no-sandbox")  # Disable sandbox for Render
+    options.add_argument("--disable-dev-shm-usage")  # Overcome limited resource problems
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-infobars")
+    # Hand control back at DOMContentLoaded; wait_until_ready decides when the page is done
+    options.page_load_strategy = "eager"
+    return options
+
+
+class _PooledBrowser:
+    """One long-lived Chrome process whose single tab is recycled between pages."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.driver = None
+        self.pages_rendered = 0
+
+    def start(self):
+        # undetected_chromedriver patches its driver binary on launch; serialize launches
+        with self.pool._launch_lock:
+            self.driver = uc.Chrome(options=_chrome_options())
+        self.driver.set_page_load_timeout(self.pool.page_load_timeout)
+        self.driver.set_script_timeout(self.pool.health_check_timeout)
+        self.pages_rendered = 0
+
+    def stop(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+        self.driver = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def is_healthy(self):
+        if self.driver is None:
+            return False
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def ensure_ready(self):
+        # Restart browsers that hung, crashed or have rendered enough pages to bloat
+        if self.pages_rendered >= self.pool.max_pages_per_browser or not self.is_healthy():
+            self.restart()
+
+    def render(self, url):
+        self.driver.get(url)
+        with timed("render_wait"):
+            self.pool.wait_until_ready(self.driver)
+        html = self.driver.page_source
+        self.pages_rendered += 1
+        # Recycle the tab so timers and sockets of the previous page don't linger
+        self.driver.get("about:blank")
+        return html
+
+
+class BrowserPool:
+    """A fixed number of headless Chrome instances shared by concurrent crawl workers.
+
+    Callers block in render() until a browser is free. A browser that fails its health
+    check, or raises while rendering, is restarted before it is handed out again.
+    """
+
+    def __init__(
+        self,
+        size=4,
+        page_load_timeout=30,
+        ready_timeout=10,
+        network_idle_time=0.5,
+        poll_interval=0.1,
+        health_check_timeout=5,
+        max_pages_per_browser=200,
+    ):
+        self.size = size
+        self.page_load_timeout = page_load_timeout
+        self.ready_timeout = ready_timeout
+        self.network_idle_time = network_idle_time
+        self.poll_interval = poll_interval
+        self.health_check_timeout = health_check_timeout
+        self.max_pages_per_browser = max_pages_per_browser
+
+        self._launch_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.renders = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._browsers = [_PooledBrowser(self) for _ in range(size)]
+        self._available = queue.Queue()
+        for browser in self._browsers:
+            self._available.put(browser)
+
+    def render(self, url):
+        requested = time.monotonic()
+        with timed("browser_wait"):
+            browser = self._available.get()
+        acquired = time.monotonic()
+        try:
+            with timed("render"):
+                browser.ensure_ready()
+                return browser.render(url)
+        except Exception:
+            # Don't hand a possibly hung browser to the next caller
+            browser.stop()
+            raise
+        finally:
+            released = time.monotonic()
+            self._available.put(browser)
+            with self._stats_lock:
+                self.renders += 1
+                self.wait_seconds += acquired - requested
+                self.busy_seconds += released - acquired
+
+    def stats(self):
+        with self._stats_lock:
+            return {"size": self.size, "renders": self.renders,
+                    "busy_seconds": round(self.busy_seconds, 3), "wait_seconds": round(self.wait_seconds, 3)}
+
+    def wait_until_ready(self, driver):
+        """Wait for DOM-ready, then for the resource count to stop growing, up to ready_timeout."""
+        deadline = time.monotonic() + self.ready_timeout
+        while time.monotonic() < deadline:
+            if driver.execute_script("return document.readyState") == "complete":
+                break
+            time.sleep(self.poll_interval)
+
+        last_count = -1
+        idle_since = time.monotonic()
+        while time.monotonic() < deadline:
+            count = driver.execute_script("return performance.getEntriesByType('resource').length")
+            now = time.monotonic()
+            if count != last_count:
+                last_count = count
+                idle_since = now
+            elif now - idle_since >= self.network_idle_time:
+                return
+            time.sleep(self.poll_interval)
+
+    def shutdown(self):
+        for browser in self._browsers:
+            browser.stop()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+def browser_pool_stats():
+    """Counters of the shared pool, or None if no page has needed a browser yet."""
+    return _default_pool.stats() if _default_pool is not None else None
+
+def get_browser_pool(size=4):
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = BrowserPool(size=size)
+            atexit.register(_default_pool.shutdown)
+    return _default_pool
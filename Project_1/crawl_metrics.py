@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+# Stages timed for every page, in pipeline order. Nested stages (browser queueing and
+# rendering within fetch, image and link checks within audit) also count toward their parent.
+STAGES = [
+    "robots", "rate_limit_wait", "conditional_get", "fetch", "browser_wait", "render", "render_wait",
+    "parse", "audit", "image_checks", "link_checks",
+]
+SLOWEST_PAGES = 10
+
+_current = threading.local()
+
+
+# --- Per-page stage timing ---
+@contextmanager
+def page_timings(timings):
+    """Attribute every timed() stage on this thread to the timings dict of one page."""
+    previous = getattr(_current, "timings", None)
+    _current.timings = timings
+    try:
+        yield timings
+    finally:
+        _current.timings = previous
+
+
+def record(stage, seconds):
+    timings = getattr(_current, "timings", None)
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started)
+
+
+def bind(timings, fn, stage=None):
+    """Wrap fn so a thread-pool call records its stages (and itself as stage) into timings."""
+    def run(*args, **kwargs):
+        with page_timings(timings), (timed(stage) if stage else nullcontext()):
+            return fn(*args, **kwargs)
+    return run
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+# --- Crawl-level counters ---
+class CrawlMetrics:
+    """Timings and counters for one crawl; summary() is what the UI and metrics file show."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.finished = None
+        self.pages = []  # {"url", "outcome", "total", **stage seconds}
+        self.outcomes = defaultdict(int)
+        self.max_queue_size = 0
+        self.extra = {}
+        self._lock = threading.Lock()
+
+    def page_done(self, url, outcome, timings, total):
+        with self._lock:
+            self.pages.append({"url": url, "outcome": outcome, "total": round(total, 4),
+                               **{stage: round(seconds, 4) for stage, seconds in timings.items()}})
+            self.outcomes[outcome] += 1
+
+    def queue_size(self, size):
+        self.max_queue_size = max(self.max_queue_size, size)
+
+    def finish(self, **extra):
+        """Stop the clock; extra holds crawl-wide counters (cache hit rates, pool use, ...)."""
+        self.finished = time.monotonic()
+        self.extra.update(extra)
+
+    def summary(self):
+        elapsed = (self.finished or time.monotonic()) - self.started
+        with self._lock:
+            pages = list(self.pages)
+            outcomes = dict(self.outcomes)
+        stages = {}
+        for stage in STAGES:
+            values = sorted(page[stage] for page in pages if stage in page)
+            if values:
+                stages[stage] = {
+                    "pages": len(values),
+                    "total_seconds": round(sum(values), 3),
+                    "mean": round(sum(values) / len(values), 4),
+                    "p50": round(_percentile(values, 0.5), 4),
+                    "p95": round(_percentile(values, 0.95), 4),
+                    "max": round(values[-1], 4),
+                }
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "pages": len(pages),
+            "pages_per_second": round(len(pages) / elapsed, 3) if elapsed > 0 else 0.0,
+            "outcomes": outcomes,
+            "max_queue_size": self.max_queue_size,
+            "stages": stages,
+            "slowest_pages": sorted(pages, key=lambda p: -p["total"])[:SLOWEST_PAGES],
+            **self.extra,
+        }
+
+
+def hit_rate(hits, misses):
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": round(hits / total, 3) if total else None}
+
+
+def write_metrics(summary, pages, path):
+    """Metrics file: crawl summary plus one timing row per page."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "pages": pages}, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from urllib.parse import urlparse
+
+CRAWL_STATE_DIR = os.getenv("CRAWL_STATE_DIR", ".crawl_state")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS frontier (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT UNIQUE NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    lastmod TEXT,
+    depth INTEGER NOT NULL DEFAULT 0,
+    inlinks INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS reports (url TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS seen (kind TEXT NOT NULL, value TEXT NOT NULL, url TEXT, PRIMARY KEY (kind, value));
+CREATE TABLE IF NOT EXISTS fingerprints (url TEXT PRIMARY KEY, exact_hash TEXT NOT NULL, simhash TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS page_versions (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body_hash TEXT,  -- text fingerprint of the static (unrendered) response, for change detection
+    title TEXT,
+    description TEXT,
+    links TEXT NOT NULL,
+    images TEXT NOT NULL,
+    report TEXT NOT NULL
+);
+"""
+
+
+def _canonical_start_url(start_url):
+    # A trailing slash or letter case in the scheme/host does not make a different crawl
+    parsed = urlparse(start_url)
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}{parsed.path.rstrip('/')}" + (
+        f"?{parsed.query}" if parsed.query else ""
+    )
+
+
+def site_key(start_url):
+    """File stem for one crawl: readable host plus a short hash of the canonical start URL.
+
+    Different start URLs on one host (http/https, a subdirectory) get separate files;
+    a trailing slash or letter case in the host does not make a new crawl.
+    """
+    netloc = urlparse(start_url).netloc.lower()
+    digest = hashlib.sha1(_canonical_start_url(start_url).encode("utf-8")).hexdigest()[:8]
+    return f"{netloc.replace(':', '_') or 'site'}_{digest}"
+
+
+class CrawlStore:
+    """On-disk crawl state (SQLite) so an interrupted crawl can resume where it stopped.
+
+    Holds the frontier, the visited set, per-page reports and the duplicate trackers.
+    Writes are committed after every page, which is cheap in WAL mode. Page versions
+    (validators, content hash and last report per URL) outlive start() so the next
+    crawl of the site can be incremental.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Audits run on worker threads; every access goes through self._lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_site(cls, start_url, directory=CRAWL_STATE_DIR):
+        return cls(os.path.join(directory, f"{site_key(start_url)}.sqlite"))
+
+    # --- Crawl metadata ---
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM crawl_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO crawl_meta (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def can_resume(self, start_url):
+        # Compared in the same canonical form site_key hashes, since every spelling opens this file
+        return (
+            self.get_meta("start_url") == _canonical_start_url(start_url)
+            and self.get_meta("status") == "running"
+        )
+
+    def start(self, start_url):
+        """Begin a new crawl, discarding state from any earlier crawl of this file."""
+        with self._lock:
+            for table in ("crawl_meta", "frontier", "reports", "seen", "fingerprints"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.commit()
+        self.set_meta("start_url", _canonical_start_url(start_url))
+        self.set_meta("status", "running")
+
+    def finish(self):
+        self.set_meta("status", "complete")
+
+    # --- Frontier ---
+    def add_to_frontier(self, url, depth=0):
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO frontier (url, depth) VALUES (?, ?)", (url, depth))
+
+    def add_many_to_frontier(self, rows):
+        """Bulk insert of (url, lastmod, depth) rows, e.g. a batch of sitemap entries."""
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO frontier (url, lastmod, depth) VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+    def update_frontier(self, rows):
+        """Store new (depth, inlinks, url) scheduling inputs for already queued URLs."""
+        with self._lock:
+            self._conn.executemany("UPDATE frontier SET depth = ?, inlinks = ? WHERE url = ?", rows)
+
+    def mark_done(self, url, state="done"):
+        with self._lock:
+            self._conn.execute("UPDATE frontier SET state = ? WHERE url = ?", (state, url))
+
+    def load_frontier(self):
+        """Return (queued (url, depth, inlinks, lastmod) rows in discovery order, every URL ever queued)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, state, depth, inlinks, lastmod FROM frontier ORDER BY seq"
+            ).fetchall()
+        queued = [(url, depth, inlinks, lastmod) for url, state, depth, inlinks, lastmod in rows if state == "queued"]
+        return queued, {row[0] for row in rows}
+
+    def urls_in_state(self, state):
+        with self._lock:
+            rows = self._conn.execute("SELECT url FROM frontier WHERE state = ? ORDER BY seq", (state,)).fetchall()
+        return [url for (url,) in rows]
+
+    # --- Reports ---
+    def save_report(self, entry):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reports (url, data) VALUES (?, ?)",
+                (entry["url"], json.dumps(entry)),
+            )
+
+    def load_reports(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM reports ORDER BY rowid").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    # --- Duplicate trackers ---
+    def add_seen(self, kind, value, url):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO seen (kind, value, url) VALUES (?, ?, ?)", (kind, str(value), url)
+            )
+
+    def load_seen(self, kind):
+        """Return {value: URL of the page that first had it}."""
+        with self._lock:
+            rows = self._conn.execute("SELECT value, url FROM seen WHERE kind = ?", (kind,)).fetchall()
+        return dict(rows)
+
+    def save_fingerprint(self, url, exact_hash, simhash):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fingerprints (url, exact_hash, simhash) VALUES (?, ?, ?)",
+                (url, exact_hash, simhash),
+            )
+
+    def load_fingerprints(self):
+        """Return (url, exact hash, simhash as int) in insertion order."""
+        with self._lock:
+            rows = self._conn.execute("SELECT url, exact_hash, simhash FROM fingerprints ORDER BY rowid").fetchall()
+        return [(url, exact, int(sim, 16)) for url, exact, sim in rows]
+
+    # --- Page versions from earlier crawls ---
+    def get_version(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body_hash, title, description, links, images, report "
+                "FROM page_versions WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        etag, last_modified, body_hash, title, description, links, images, report = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_hash": body_hash,
+            "title": title,
+            "description": description,
+            "links": json.loads(links),
+            "images": json.loads(images),
+            "report": json.loads(report),
+        }
+
+    def save_version(self, url, etag, last_modified, body_hash, title, description, links, images, report):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_versions "
+                "(url, etag, last_modified, body_hash, title, description, links, images, report) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body_hash, title, description, json.dumps(links), json.dumps(images),
+                 json.dumps(report)),
+            )
+
+    def checkpoint(self):
+        with self._lock:
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+class PersistentSeenMap(dict):
+    """A duplicate tracker ({value: first URL}) whose new entries are also written to the crawl store.
+
+    Entries are keyed to their page, so a page re-audited after a resume never matches
+    the entry it wrote itself before the interruption.
+    """
+
+    def __init__(self, store, kind):
+        super().__init__(store.load_seen(kind))
+        self.store = store
+        self.kind = kind
+
+    def setdefault(self, value, url):
+        if value not in self:
+            super().__setitem__(value, url)
+            self.store.add_seen(self.kind, value, url)
+        return self[value]
@@ -0,0 +1,595 @@
+import asyncio
+import heapq
+import inspect
+import os
+import time
+from collections import Counter
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from fnmatch import fnmatchcase
+from functools import partial
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urljoin, urlunparse
+
+from browser_pool import browser_pool_stats
+from crawl_metrics import CrawlMetrics, bind, hit_rate
+from helpers import full_seo_audit, get_rendered_html, refresh_duplicate_flags, refresh_image_checks
+from hybrid_fetch import NOT_HTML, conditional_get, is_html_response
+from crawl_store import CrawlStore, PersistentSeenMap
+from fingerprint import ContentFingerprintIndex
+from link_checker import LinkChecker
+from page_parser import parse_page
+from rate_limiter import host_rate_limiter
+from robots import RobotsCache
+from sitemaps import sitemap_batches
+
+# --- Normalize and Clean URLs ---
+def normalize_url(url, keep_query_params=()):
+    """Canonical form used for de-duplication: no fragment, no trailing slash, and only the
+    whitelisted query parameters (sorted), so facet/tracking permutations collapse to one URL."""
+    parsed = urlparse(url)
+    clean_path = parsed.path.rstrip('/')
+    query = ''
+    if keep_query_params:
+        query = urlencode(sorted((k, v) for k, v in parse_qsl(parsed.query) if k in keep_query_params))
+    return urlunparse((parsed.scheme, parsed.netloc, clean_path, '', query, ''))
+
+def is_valid_link(href):
+    return (
+        href and
+        not href.startswith('#') and
+        not href.lower().startswith('javascript')
+    )
+
+# Links to these are files, not pages: the audit checks them, the crawler does not queue them
+NON_HTML_EXTENSIONS = {
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".csv", ".txt", ".rtf",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif", ".svg", ".ico", ".bmp", ".tif", ".tiff",
+    ".mp3", ".wav", ".ogg", ".mp4", ".m4v", ".mov", ".avi", ".webm", ".mkv",
+    ".zip", ".rar", ".7z", ".gz", ".tar", ".exe", ".dmg", ".apk",
+    ".css", ".js", ".json", ".woff", ".woff2", ".ttf", ".otf", ".eot",
+}
+
+def is_file_link(url):
+    return os.path.splitext(urlparse(url).path)[1].lower() in NON_HTML_EXTENSIONS
+
+# --- Crawl Settings & Progress ---
+@dataclass
+class CrawlConfig:
+    max_concurrency: int = 8        # pages in flight across all hosts
+    per_host_concurrency: int = 4   # pages in flight against a single host
+    max_pages: Optional[int] = None  # stop discovering once this many URLs are known
+    max_depth: Optional[int] = None  # link hops from the start URL (sitemap URLs count as depth 1)
+    # Glob on path+query -> max URLs queued for it, e.g. {"/search*": 50, "/products/*": 2000}
+    path_quotas: Dict[str, int] = field(default_factory=dict)
+    # Query parameters that select different content (e.g. "page", "id"); all others are dropped
+    keep_query_params: Tuple[str, ...] = ()
+    incremental: bool = False       # reuse reports of pages unchanged since the last crawl (needs a store)
+    use_sitemaps: bool = True       # seed the frontier from robots.txt Sitemap: lines or /sitemap.xml
+
+def parse_path_quotas(specs):
+    """Turn "PATTERN=LIMIT" strings (CLI flags, UI lines) into CrawlConfig.path_quotas."""
+    quotas = {}
+    for spec in specs:
+        spec = spec.strip()
+        if not spec:
+            continue
+        pattern, sep, limit = spec.rpartition("=")
+        if not sep or not pattern.strip() or not limit.strip().isdigit():
+            raise ValueError(f"Invalid path quota {spec!r}, expected PATTERN=LIMIT (e.g. /search*=50)")
+        quotas[pattern.strip()] = int(limit)
+    return quotas
+
+@dataclass
+class CrawlProgress:
+    start_url: str
+    pages_done: int
+    pages_discovered: int
+    queue_size: int
+    current_url: Optional[str]
+    finished: bool = False
+
+# --- Frontier ---
+SITEMAP_DEPTH = 1
+# Priority = depth - inlink bonus - freshness bonus; lower is crawled first
+INLINK_WEIGHT = 0.1
+MAX_INLINK_BONUS = 2.0
+LASTMOD_WEIGHT = 1.0
+LASTMOD_HORIZON_DAYS = 365
+
+def lastmod_recency(lastmod, today=None):
+    """1.0 for a sitemap <lastmod> of today, falling to 0.0 at LASTMOD_HORIZON_DAYS or when unparseable."""
+    try:
+        modified = date.fromisoformat(lastmod[:10])
+    except (TypeError, ValueError):
+        return 0.0
+    age = ((today or date.today()) - modified).days
+    return min(max(1 - age / LASTMOD_HORIZON_DAYS, 0.0), 1.0)
+
+class Frontier:
+    """Priority queue of URLs still to crawl, with O(1) membership checks for everything ever queued.
+
+    Shallow, often-linked and recently modified pages come first. Depth, page and per-pattern
+    limits are enforced on admission. When a queued URL gains inlinks or a shallower path its
+    priority is pushed again, and stale heap entries are skipped on pop.
+    """
+
+    def __init__(self, store=None, config=None):
+        self.config = config or CrawlConfig()
+        self.store = store
+        self._heap = []
+        self._queued = {}  # url -> current priority
+        self._seen = set()
+        self._seq = 0
+        self.depth = {}
+        self.inlinks = Counter()
+        self.lastmod = {}
+        self.quota_used = Counter()
+        if store is not None:
+            queued, seen = store.load_frontier()
+            self._seen.update(seen)
+            for url in seen:
+                pattern = self._quota_pattern(url)
+                if pattern:
+                    self.quota_used[pattern] += 1
+            for url, depth, inlinks, lastmod in queued:
+                self.depth[url] = depth
+                self.inlinks[url] = inlinks
+                if lastmod:
+                    self.lastmod[url] = lastmod
+                self._push(url)
+
+    def normalize(self, url):
+        return normalize_url(url, self.config.keep_query_params)
+
+    def priority(self, url):
+        return (
+            self.depth.get(url, 0)
+            - min(self.inlinks[url] * INLINK_WEIGHT, MAX_INLINK_BONUS)
+            - lastmod_recency(self.lastmod.get(url)) * LASTMOD_WEIGHT
+        )
+
+    def _push(self, url):
+        priority = self.priority(url)
+        self._queued[url] = priority
+        self._seq += 1
+        heapq.heappush(self._heap, (priority, self._seq, url))
+
+    def _quota_pattern(self, url):
+        if not self.config.path_quotas:
+            return None
+        parsed = urlparse(url)
+        target = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+        for pattern in self.config.path_quotas:
+            if fnmatchcase(target, pattern):
+                return pattern
+        return None
+
+    @property
+    def is_full(self):
+        return bool(self.config.max_pages) and len(self._seen) >= self.config.max_pages
+
+    def _admit(self, url, depth):
+        """Record a new URL if no limit rejects it; rejected URLs may still be admitted later via a shallower path."""
+        if self.config.max_depth is not None and depth > self.config.max_depth:
+            return False
+        if self.is_full:
+            return False
+        pattern = self._quota_pattern(url)
+        if pattern:
+            if self.quota_used[pattern] >= self.config.path_quotas[pattern]:
+                return False
+            self.quota_used[pattern] += 1
+        self._seen.add(url)
+        self.depth[url] = depth
+        return True
+
+    def add(self, url, depth=0):
+        normalized = self.normalize(url)
+        if normalized in self._seen or not self._admit(normalized, depth):
+            return False
+        self._push(normalized)
+        if self.store is not None:
+            self.store.add_to_frontier(normalized, depth)
+        return True
+
+    def add_links(self, links, depth):
+        """Queue the links of a page at depth; every link is also an inlink for scheduling."""
+        added, updated = [], []
+        for url in dict.fromkeys(self.normalize(link) for link in links):
+            if url in self._seen:
+                if url not in self._queued:
+                    continue
+                # Already waiting: another inlink (and maybe a shorter path) raises its priority
+                self.inlinks[url] += 1
+                self.depth[url] = min(self.depth[url], depth + 1)
+                self._push(url)
+                updated.append((self.depth[url], self.inlinks[url], url))
+            elif self._admit(url, depth + 1):
+                self.inlinks[url] += 1
+                self._push(url)
+                added.append(url)
+        if self.store is not None:
+            for url in added:
+                self.store.add_to_frontier(url, depth + 1)
+            self.store.update_frontier(updated + [(depth + 1, 1, url) for url in added])
+        return len(added)
+
+    def add_many(self, entries):
+        """Queue sitemap (url, lastmod) pairs in bulk."""
+        added = []
+        for url, lastmod in entries:
+            normalized = self.normalize(url)
+            if normalized in self._seen or not self._admit(normalized, SITEMAP_DEPTH):
+                continue
+            if lastmod:
+                self.lastmod[normalized] = lastmod
+            self._push(normalized)
+            added.append((normalized, lastmod, SITEMAP_DEPTH))
+        if self.store is not None and added:
+            self.store.add_many_to_frontier(added)
+        return len(added)
+
+    def pop(self):
+        while self._heap:
+            priority, _, url = heapq.heappop(self._heap)
+            if self._queued.get(url) == priority:
+                del self._queued[url]
+                return url
+        raise IndexError("pop from an empty frontier")
+
+    @property
+    def discovered(self):
+        return len(self._seen)
+
+    def __len__(self):
+        return len(self._queued)
+
+# --- Crawl Engine ---
+class CrawlEngine:
+    """Crawls every same-domain page reachable from start_url with a bounded worker pool.
+
+    Rendering and auditing are blocking (Selenium / requests), so each page runs on a
+    thread pool while the event loop only schedules work and updates the frontier.
+    """
+
+    def __init__(
+        self,
+        start_url: str,
+        config: Optional[CrawlConfig] = None,
+        progress_callback: Optional[Callable[[CrawlProgress], None]] = None,
+        fetch: Callable = get_rendered_html,
+        audit: Callable = full_seo_audit,
+        store: Optional[CrawlStore] = None,
+        global_limit: Optional[asyncio.Semaphore] = None,
+        resume: bool = True,
+    ):
+        self.start_url = start_url
+        self.config = config or CrawlConfig()
+        self.progress_callback = progress_callback
+        self.fetch = fetch
+        # Fetchers that accept response= (get_rendered_html) reuse the incremental check's download
+        self._fetch_takes_response = "response" in inspect.signature(fetch).parameters
+        self.audit = audit
+        # Shared by engines crawling several sites at once to cap total pages in flight
+        self.global_limit = global_limit
+        self.base_domain = urlparse(start_url).netloc
+
+        # With a store, crawl state is checkpointed to disk and an unfinished crawl resumes
+        # (unless resume=False, which starts the store over)
+        self.store = store
+        self.resumed = store is not None and resume and store.can_resume(start_url)
+        if store is not None and not self.resumed:
+            store.start(start_url)
+
+        self.frontier = Frontier(store, self.config)
+        self.reports = store.load_reports() if self.resumed else []
+        self.blocked_urls = store.urls_in_state("blocked") if self.resumed else []
+        # Same-host URLs that turned out to be files (PDFs, images...) rather than pages
+        self.non_html_urls = store.urls_in_state("non_html") if self.resumed else []
+        self.pages_done = len(self.reports) + len(self.blocked_urls) + len(self.non_html_urls)
+        self.resumed_pages = self.pages_done
+
+        # Duplication trackers shared by every page of the crawl
+        if store is not None:
+            self.titles_seen = PersistentSeenMap(store, "title")
+            self.descs_seen = PersistentSeenMap(store, "description")
+        else:
+            self.titles_seen = {}
+            self.descs_seen = {}
+        # Exact and near-duplicate content across the whole crawl
+        self.content_index = ContentFingerprintIndex(store)
+
+        # Each internal link is HEAD-checked once per crawl, not once per page linking to it
+        self.link_checker = LinkChecker()
+        # Images shared across pages (logos, icons, sprites) are likewise checked once
+        self.image_checker = LinkChecker()
+        # robots.txt is fetched once per host and consulted before any page is fetched
+        self.robots_cache = RobotsCache()
+        # Per-page stage timings and crawl-wide counters for this run
+        self.metrics = CrawlMetrics()
+
+        self._active = 0
+        self._cond = None
+        self._host_limits = {}
+        self._executor = None
+
+    def run(self):
+        return asyncio.run(self.crawl())
+
+    async def crawl(self):
+        self._cond = asyncio.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=self.config.max_concurrency)
+        self.frontier.add(self.start_url)
+        pool_before = browser_pool_stats()
+        rates_before = host_rate_limiter.stats()
+        try:
+            tasks = [asyncio.create_task(self._worker()) for _ in range(self.config.max_concurrency)]
+            if self.config.use_sitemaps and not (self.store and self.store.get_meta("sitemaps_seeded")):
+                tasks.append(asyncio.create_task(self._seed_from_sitemaps()))
+            await asyncio.gather(*tasks)
+            if self.store is not None:
+                self.store.finish()
+            self._finish_metrics(pool_before, rates_before)
+            self._report_progress(None, finished=True)
+        finally:
+            self._executor.shutdown(wait=False)
+            self.link_checker.shutdown()
+            self.image_checker.shutdown()
+        return self.reports
+
+    async def _worker(self):
+        while True:
+            url = await self._next_url()
+            if url is None:
+                return
+            try:
+                async with self.global_limit or nullcontext(), self._host_limit(url):
+                    await self._process(url)
+            finally:
+                await self._task_done()
+
+    async def _seed_from_sitemaps(self):
+        """Stream sitemap URLs into the frontier in batches while the workers are already crawling."""
+        loop = asyncio.get_running_loop()
+        # Counts as an active task so idle workers wait for seeds instead of exiting
+        async with self._cond:
+            self._active += 1
+        try:
+            robots_rules = await loop.run_in_executor(self._executor, self.robots_cache.get, self.start_url)
+            batches = sitemap_batches(self.start_url, robots_rules)
+            while True:
+                batch = await loop.run_in_executor(self._executor, next, batches, None)
+                if batch is None:
+                    break
+                async with self._cond:
+                    self.frontier.add_many(batch)
+                    self._cond.notify_all()
+                if self.frontier.is_full:
+                    break
+            if self.store is not None:
+                self.store.set_meta("sitemaps_seeded", "1")
+        except Exception:
+            # Sitemaps only speed up discovery; link following still finds the site
+            pass
+        finally:
+            await self._task_done()
+
+    async def _next_url(self):
+        async with self._cond:
+            while not self.frontier and self._active:
+                await self._cond.wait()
+            if not self.frontier:
+                return None
+            self._active += 1
+            return self.frontier.pop()
+
+    async def _task_done(self):
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def _host_limit(self, url):
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.config.per_host_concurrency)
+        return self._host_limits[host]
+
+    def _rate_limit_stats(self, rates_before):
+        # The limiter is shared process-wide: keep this crawl's hosts and the counts it added
+        hosts = {self.base_domain} | self.link_checker.hosts() | self.image_checker.hosts()
+        stats = {}
+        for host, after in host_rate_limiter.stats().items():
+            if host not in hosts:
+                continue
+            before = rates_before.get(host, {})
+            stats[host] = {
+                **after,
+                "requests": after["requests"] - before.get("requests", 0),
+                "throttled": after["throttled"] - before.get("throttled", 0),
+                "waited_seconds": round(after["waited_seconds"] - before.get("waited_seconds", 0.0), 2),
+            }
+        return stats
+
+    def _finish_metrics(self, pool_before, rates_before):
+        extra = {
+            "link_check_cache": hit_rate(self.link_checker.hits, self.link_checker.misses),
+            "image_check_cache": hit_rate(self.image_checker.hits, self.image_checker.misses),
+            "rate_limits": self._rate_limit_stats(rates_before),
+        }
+        pool_after = browser_pool_stats()
+        if pool_after:
+            # The pool is shared process-wide, so only this crawl's share is reported
+            before = pool_before or {"renders": 0, "busy_seconds": 0.0, "wait_seconds": 0.0}
+            elapsed = time.monotonic() - self.metrics.started
+            busy = pool_after["busy_seconds"] - before["busy_seconds"]
+            extra["browser_pool"] = {
+                "size": pool_after["size"],
+                "renders": pool_after["renders"] - before["renders"],
+                "utilization": round(busy / (pool_after["size"] * elapsed), 3) if elapsed > 0 else None,
+                "wait_seconds": round(pool_after["wait_seconds"] - before["wait_seconds"], 3),
+            }
+        self.metrics.finish(**extra)
+
+    async def _process(self, url):
+        loop = asyncio.get_running_loop()
+        timings = {}
+        started = time.perf_counter()
+        outcome = "audited"
+
+        def run(stage, fn, *args):
+            return loop.run_in_executor(self._executor, bind(timings, fn, stage), *args)
+
+        # Stays None if the crawl is interrupted mid-page, so the URL is retried on resume
+        state = None
+        try:
+            robots_rules = await run("robots", self.robots_cache.get, url)
+            if not robots_rules.can_fetch(url):
+                self.blocked_urls.append(url)
+                outcome = state = "blocked"
+                return
+            host_rate_limiter.set_crawl_delay(url, robots_rules.crawl_delay())
+
+            version = {}
+            previous = None
+            incremental = self.config.incremental and self.store is not None
+            if incremental:
+                previous = self.store.get_version(url)
+            # A page never audited before has nothing to compare against, but its response still
+            # carries the validators the next crawl sends; the fetch below reuses that download
+            if previous is not None or (incremental and self._fetch_takes_response):
+                version = await run("conditional_get", self._check_version, url, previous or {})
+                if version.get("unchanged"):
+                    await self._reuse_report(url, previous)
+                    outcome, state = "reused", "done"
+                    return
+
+            response = version.get("response")
+            if response is not None and self._fetch_takes_response:
+                html = await run("fetch", partial(self.fetch, response=response), url)
+            else:
+                html = await run("fetch", self.fetch, url)
+            if html is NOT_HTML:
+                self.non_html_urls.append(url)
+                outcome = state = "non_html"
+                return
+            if not html:
+                self._add_report({"url": url, "report": {"error": f"Could not render page: {url}"}})
+                outcome, state = "failed", "done"
+                return
+
+            # One parse feeds both the audit and link discovery (the check's parse, if it saw the same HTML)
+            if version.get("page") is not None and html == version["html"]:
+                page = version["page"]
+            else:
+                page = await run("parse", parse_page, html)
+            audit = partial(self.audit, link_checker=self.link_checker, robots_cache=self.robots_cache, page=page,
+                            image_checker=self.image_checker)
+            report = await run(
+                "audit", audit,
+                url, self.titles_seen, self.descs_seen, self.content_index, html,
+            )
+            self._add_report({"url": url, "report": report})
+            links = self._page_links(url, page)
+            self._queue_links(url, links)
+            if incremental:
+                self.store.save_version(
+                    url, version.get("etag"), version.get("last_modified"), version.get("static_hash"),
+                    (page.title or "").strip(), (page.meta_description or "").strip(), links,
+                    [img.get("src") for img in page.images], report,
+                )
+            state = "done"
+
+        except Exception as e:
+            self._add_report({"url": url, "error": str(e)})
+            outcome, state = "error", "done"
+
+        finally:
+            self.pages_done += 1
+            if state:
+                self.metrics.page_done(url, outcome, timings, time.perf_counter() - started)
+            if self.store is not None and state:
+                self.store.mark_done(url, state)
+                self.store.checkpoint()
+            self._report_progress(url)
+
+    def _add_report(self, entry):
+        self.reports.append(entry)
+        if self.store is not None:
+            self.store.save_report(entry)
+
+    def _check_version(self, url, previous):
+        """Conditional GET against the validators and content hash stored by the last crawl.
+
+        Compares the page's text fingerprint rather than raw bytes, so nonces and timestamps
+        in the markup don't count as changes. The response (with its validators) and its parse
+        are returned for the fetch, audit and saved version to reuse.
+        """
+        try:
+            response = conditional_get(url, previous.get("etag"), previous.get("last_modified"))
+        except Exception:
+            return {}
+        if response.status_code == 304:
+            return {"unchanged": True}
+        version = {
+            "unchanged": False,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "response": response,
+        }
+        if response.status_code < 400 and is_html_response(response):
+            version["html"] = response.text
+            page = version["page"] = parse_page(version["html"])
+            # The static response's text, not the (maybe JS-rendered) text the audit saw,
+            # so a rendered page compares equal to its own unchanged server HTML
+            version["static_hash"] = ContentFingerprintIndex.fingerprint(page.page_text)["hash"]
+            version["unchanged"] = version["static_hash"] == previous.get("body_hash")
+        return version
+
+    async def _reuse_report(self, url, previous):
+        loop = asyncio.get_running_loop()
+        report = previous["report"]
+        # Duplicate flags depend on the rest of this crawl, and linked pages and images may have broken since
+        await loop.run_in_executor(
+            self._executor, refresh_duplicate_flags,
+            url, report, previous["title"], previous["description"],
+            self.titles_seen, self.descs_seen, self.content_index,
+        )
+        report["internal_link_errors"] = await loop.run_in_executor(
+            self._executor, self.link_checker.errors, list(dict.fromkeys(previous["links"]))
+        )
+        await loop.run_in_executor(
+            self._executor, refresh_image_checks, url, report, previous["images"], self.image_checker
+        )
+        report["unchanged_since_last_audit"] = True
+        self._add_report({"url": url, "report": report})
+        self._queue_links(url, previous["links"])
+
+    def _page_links(self, url, page):
+        links = []
+        for anchor in page.anchors:
+            href = anchor.href
+            if not is_valid_link(href):
+                continue
+            full_url = urljoin(url, href)
+            if urlparse(full_url).netloc == self.base_domain:
+                links.append(full_url)
+        return links
+
+    def _queue_links(self, url, links):
+        # Linked files are still link-checked by the audit; only pages go on the frontier
+        self.frontier.add_links([link for link in links if not is_file_link(link)], self.frontier.depth.get(url, 0))
+
+    def _report_progress(self, url, finished=False):
+        self.metrics.queue_size(len(self.frontier))
+        if self.progress_callback:
+            self.progress_callback(CrawlProgress(
+                start_url=self.start_url,
+                pages_done=self.pages_done,
+                pages_discovered=self.frontier.discovered,
+                queue_size=len(self.frontier),
+                current_url=url,
+                finished=finished,
+            ))
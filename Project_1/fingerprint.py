@@ -0,0 +1,148 @@
+import hashlib
+import re
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+SIMHASH_BITS = 64
+# Pages whose SimHashes differ in at most this many bits count as near-duplicates
+NEAR_DUPLICATE_DISTANCE = 3
+# Split the hash into DISTANCE + 1 bands: two hashes within DISTANCE bits must agree on at least one
+LSH_BANDS = NEAR_DUPLICATE_DISTANCE + 1
+BAND_BITS = SIMHASH_BITS // LSH_BANDS
+SHINGLE_SIZE = 3
+# Near-duplicate URLs reported per page
+MAX_NEAR_DUPLICATES = 5
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def exact_hash(text):
+    """Stable across processes and machines, unlike the built-in hash()."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _feature_hashes(text):
+    words = TOKEN_PATTERN.findall(text.lower())
+    if len(words) >= SHINGLE_SIZE:
+        features = (" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+    else:
+        features = iter(words)
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big") for f in features),
+        dtype=np.uint64,
+    )
+
+
+def simhash(text):
+    """64-bit SimHash over word shingles; similar texts get hashes a few bits apart."""
+    hashes = _feature_hashes(text)
+    if not hashes.size:
+        return 0
+    # One row of bits per shingle; each bit votes +1/-1 and the sign of the total sets the output bit
+    bits = np.unpackbits(hashes.astype(">u8").view(np.uint8).reshape(-1, 8), axis=1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(hashes)
+    return int("".join("1" if v > 0 else "0" for v in votes), 2)
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _bands(value):
+    mask = (1 << BAND_BITS) - 1
+    return [(band, (value >> (band * BAND_BITS)) & mask) for band in range(LSH_BANDS)]
+
+
+class ContentFingerprintIndex:
+    """Sitewide exact and near-duplicate content detection.
+
+    Exact duplicates are found by SHA-1 of the page text. Near-duplicates use SimHash with an
+    LSH band index that holds representatives only: a page joins a band bucket just when it
+    matches none of the representatives already there. Templated pages therefore share one
+    representative per bucket, and each new page is compared with a handful of hashes
+    instead of every similar page seen so far.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._exact = {}                 # exact hash -> first URL seen with it
+        self._simhashes = {}             # URL -> simhash
+        self._exact_of = {}              # URL -> exact hash
+        self._bands = defaultdict(list)  # (band, value) -> [(representative URL, its simhash)]
+        self._parent = {}                # union-find over duplicate URLs
+        self._lock = threading.Lock()
+        if store is not None:
+            for url, exact, sim in store.load_fingerprints():
+                self._insert(url, exact, sim)
+
+    @staticmethod
+    def fingerprint(text):
+        return {"hash": exact_hash(text), "simhash": format(simhash(text), "016x")}
+
+    def add_fingerprint(self, url, fingerprint):
+        """Index a page and return {"duplicate_of": URL or None, "near_duplicates": [URLs]}."""
+        exact, sim = fingerprint["hash"], int(fingerprint["simhash"], 16)
+        with self._lock:
+            if url in self._simhashes:
+                self._remove(url)
+            result = self._insert(url, exact, sim)
+        if self.store is not None:
+            self.store.save_fingerprint(url, exact, fingerprint["simhash"])
+        return result
+
+    def _insert(self, url, exact, sim):
+        duplicate_of = self._exact.setdefault(exact, url)
+        duplicate_of = duplicate_of if duplicate_of != url else None
+
+        near = []
+        for key in _bands(sim):
+            bucket = self._bands[key]
+            # Stop at the first representative within range; otherwise this page represents the bucket
+            match = next((other for other, other_sim in bucket
+                          if hamming_distance(sim, other_sim) <= NEAR_DUPLICATE_DISTANCE), None)
+            if match is None:
+                bucket.append((url, sim))
+            elif match != url and match not in near:
+                near.append(match)
+
+        self._simhashes[url] = sim
+        self._exact_of[url] = exact
+        self._parent.setdefault(url, url)
+        for other in near:
+            self._union(url, other)
+        return {"duplicate_of": duplicate_of, "near_duplicates": near[:MAX_NEAR_DUPLICATES]}
+
+    def _remove(self, url):
+        # Re-indexing a URL (e.g. a resumed page) replaces its old fingerprint
+        del self._simhashes[url]
+        exact = self._exact_of.pop(url)
+        if self._exact.get(exact) == url:
+            del self._exact[exact]
+        # Its band entries stay: they still stand for the other pages that matched them
+
+    def _find(self, url):
+        while self._parent[url] != url:
+            self._parent[url] = self._parent[self._parent[url]]
+            url = self._parent[url]
+        return url
+
+    def _union(self, a, b):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            self._parent[root_b] = root_a
+
+    def clusters(self):
+        """Groups of two or more URLs with identical or near-identical content."""
+        with self._lock:
+            groups = defaultdict(list)
+            for url in self._simhashes:
+                groups[self._find(url)].append(url)
+            clusters = []
+            for urls in groups.values():
+                if len(urls) < 2:
+                    continue
+                kind = "exact" if len({self._exact_of[u] for u in urls}) == 1 else "near"
+                clusters.append({"type": kind, "size": len(urls), "urls": sorted(urls)})
+        return sorted(clusters, key=lambda c: -c["size"])
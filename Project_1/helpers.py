@@ -9,18 +9,21 @@ import matplotlib.pyplot as plt
 from typing import List
 from urllib.parse import urlparse, urljoin
 from SimplerLLM.language.llm import LLM, LLMProvider
-from bs4 import BeautifulSoup
 import requests
 from textwrap import wrap
 import json
 import streamlit as st
 import os
 from dotenv import load_dotenv
-import re
-import time
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
+import threading
+from browser_pool import get_browser_pool
+from hybrid_fetch import NOT_HTML, fetch_html, fetch_static_html, is_html_response
+from link_checker import LinkChecker
+from robots import RobotsCache
+from rate_limiter import host_rate_limiter
+from crawl_metrics import timed
+from page_parser import parse_page
+from fingerprint import ContentFingerprintIndex
 
 load_dotenv()
 llm_instance = LLM.create(
@@ -30,6 +33,9 @@ llm_instance = LLM.create(
 )
 
 def display_wrapped_json(data, width=80):
+    st.code(wrapped_json(data, width), language='json')
+
+def wrapped_json(data, width=80):
     def wrap_str(s):
         return '\n'.join(wrap(s, width=width))
     def process_item(item):
@@ -42,52 +48,117 @@ def display_wrapped_json(data, width=80):
         else:
             return item
     wrapped_data = process_item(data)
-    st.code(json.dumps(wrapped_data, indent=2), language='json')
+    return json.dumps(wrapped_data, indent=2)
+
+# "hybrid" tries plain HTTP first, "browser" always renders with Chrome, "static" never does
+RENDER_MODE = os.getenv("RENDER_MODE", "hybrid")
 
-def get_rendered_html(url):
+def render_with_browser(url):
+    # The browser bypasses the pooled session, so it takes its own token from the host's rate limit
+    host_rate_limiter.acquire(url)
+    html = get_browser_pool(size=int(os.getenv("BROWSER_POOL_SIZE", 4))).render(url)
+    print(f"✅ Rendered using headless Chrome: {url}")
+    return html
+
+def get_rendered_html(url, mode=None, response=None):
+    # response: a GET of url already made by the caller, reused instead of fetching again (not in browser mode)
+    mode = mode or RENDER_MODE
     try:
-        import undetected_chromedriver as uc
-        from selenium.webdriver.chrome.options import Options
-
-        # Set Chrome options for headless rendering
-        options = uc.ChromeOptions()
-        options.add_argument("--headless")  # Run headless
-        options.add_argument("--no-sandbox")  # Disable sandbox for Render
-        options.add_argument("--disable-dev-shm-usage")  # Overcome limited resource problems
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-infobars")
-
-        # Launch the browser
-        driver = uc.Chrome(options=options)
-        driver.set_page_load_timeout(30)
-        driver.get(url)
-
-        time.sleep(5)  # Wait for JavaScript to load
-        html = driver.page_source
-        driver.quit()
-
-        print(f"✅ Rendered using headless Chrome: {url}")
-        return html
+        if mode == "browser":
+            return render_with_browser(url)
+        if mode == "static":
+            if response is not None:
+                return response.text if is_html_response(response) else NOT_HTML
+            return fetch_static_html(url)
+        return fetch_html(url, render_with_browser, response=response)
 
     except Exception as e:
-        print(f"❌ Failed to render page using Selenium: {e}")
+        print(f"❌ Failed to render page: {e}")
         return None
 
 def extract_internal_links(html, base_url):
-    soup = BeautifulSoup(html, "html.parser")
     internal_links = set()
     domain = urlparse(base_url).netloc
-    for tag in soup.find_all("a", href=True):
-        href = tag["href"]
+    for anchor in parse_page(html).anchors:
+        href = anchor.href
         if href.startswith("/") or domain in href:
             full_url = urljoin(base_url, href)
             internal_links.add(full_url.split("#")[0])
     return list(internal_links)
 
-def full_seo_audit(url, titles_seen, descs_seen, content_hashes_seen, html):
+_seen_lock = threading.Lock()
+
+def _mark_seen(seen, value, url):
+    """True if another page already had value; seen maps each value to the first URL with it."""
+    # Pages are audited concurrently, so check-and-add must be atomic
+    with _seen_lock:
+        return seen.setdefault(value, url) != url
+
+def refresh_duplicate_flags(url, report, title_text, desc_text, titles_seen, descs_seen, content_index):
+    # Also used to re-check reports reused from an earlier crawl against this crawl's trackers
+    for key, seen, value in (
+        ("duplicate_title", titles_seen, title_text),
+        ("duplicate_meta_description", descs_seen, desc_text),
+    ):
+        report.pop(key, None)
+        if _mark_seen(seen, value, url):
+            report[key] = True
+
+    report.pop("duplicate_content", None)
+    report.pop("near_duplicate_of", None)
+    matches = content_index.add_fingerprint(url, report["content_fingerprint"])
+    if matches["duplicate_of"]:
+        report["duplicate_content"] = True
+    near = [u for u in matches["near_duplicates"] if u != matches["duplicate_of"]]
+    if near:
+        report["near_duplicate_of"] = near
+
+HEAVY_IMAGE_BYTES = 300 * 1024
+
+def submit_image_checks(url, srcs, image_checker):
+    """Start a check of every distinct image src on the page; returns {src: future}."""
+    image_checks = {}
+    for src in srcs:
+        if src and not src.startswith("data:") and src not in image_checks:
+            image_checks[src] = image_checker.check(urljoin(url, src))
+    return image_checks
+
+def image_check_results(image_checks):
+    """Wait for submitted image checks and return the report's image check fields."""
+    broken_images = []
+    heavy_images = []
+    total_image_bytes = 0
+    with timed("image_checks"):
+        checks = {src: future.result() for src, future in image_checks.items()}
+    for src, check in checks.items():
+        if "error" in check:
+            broken_images.append({"src": src, "error": check["error"]})
+        elif check["status"] >= 400:
+            broken_images.append({"src": src, "status": check["status"]})
+        elif check["content_length"]:
+            total_image_bytes += check["content_length"]
+            if check["content_length"] > HEAVY_IMAGE_BYTES:
+                heavy_images.append({"src": src, "bytes": check["content_length"],
+                                     "content_type": check["content_type"]})
+    return {
+        "checked_images": len(image_checks),
+        "total_image_bytes": total_image_bytes,
+        "broken_images": broken_images,
+        "heavy_images": heavy_images,
+    }
+
+def refresh_image_checks(url, report, srcs, image_checker):
+    # Reports reused from an earlier crawl: images can break or grow while the page text stays the same
+    if "images" in report:
+        report["images"].update(image_check_results(submit_image_checks(url, srcs, image_checker)))
+
+def full_seo_audit(url, titles_seen, descs_seen, content_index, html, link_checker=None, robots_cache=None, page=None,
+                   image_checker=None):
     result = {}
+    # Checkers created here (standalone calls) are shut down again before returning
+    own_checkers = []
     visited_urls = set()
+    internal_links = []
     internal_errors = []
 
     try:
@@ -95,15 +166,13 @@ def full_seo_audit(url, titles_seen, descs_seen, content_hashes_seen, html):
             result["error"] = f"Could not render page: {url}"
             return result
 
-        soup = BeautifulSoup(html, "html.parser")
+        # Callers that already parsed the page (the crawler) pass it in to avoid a second parse
+        page = page or parse_page(html)
         parsed_url = urlparse(url)
 
         # --- Meta Data ---
-        title_tag = soup.find("title")
-        desc_tag = soup.find("meta", {"name": "description"})
-
-        title_text = title_tag.text.strip() if title_tag else ""
-        desc_text = desc_tag["content"].strip() if desc_tag and desc_tag.get("content") else ""
+        title_text = (page.title or "").strip()
+        desc_text = (page.meta_description or "").strip()
 
         result["title"] = {
             "text": title_text or "Missing",
@@ -117,32 +186,22 @@ def full_seo_audit(url, titles_seen, descs_seen, content_hashes_seen, html):
         }
 
         # Duplicate Checks
-        if title_text in titles_seen:
-            result["duplicate_title"] = True
-        titles_seen.add(title_text)
-
-        if desc_text in descs_seen:
-            result["duplicate_meta_description"] = True
-        descs_seen.add(desc_text)
-
-        page_text = " ".join(soup.stripped_strings)
-        text_hash = hash(page_text)
-        if text_hash in content_hashes_seen:
-            result["duplicate_content"] = True
-        content_hashes_seen.add(text_hash)
+        page_text = page.page_text
+        result["content_fingerprint"] = ContentFingerprintIndex.fingerprint(page_text)
+        refresh_duplicate_flags(url, result, title_text, desc_text, titles_seen, descs_seen,
+                                content_index if content_index is not None else ContentFingerprintIndex())
 
         # Headings
-        result["headings"] = {f"H{i}": len(soup.find_all(f"h{i}")) for i in range(1, 7)}
-        h1_tag = soup.find("h1")
-        h1_text = h1_tag.text.strip() if h1_tag else ""
+        result["headings"] = dict(page.headings)
+        h1_text = (page.h1_text or "").strip()
         result["H1_content"] = h1_text
         if h1_text and title_text and h1_text.strip().lower() == title_text.strip().lower():
             result["h1_title_duplicate"] = True
 
         # Text Stats
-        total_words = len(re.findall(r'\b\w+\b', page_text))
-        anchor_tags = soup.find_all("a", href=True)
-        anchor_texts = [a.get_text(strip=True) for a in anchor_tags if a.get_text(strip=True)]
+        total_words = page.total_words
+        anchor_tags = page.anchors
+        anchor_texts = [a.text for a in anchor_tags if a.text]
         anchor_words = sum(len(a.split()) for a in anchor_texts)
 
         result["word_stats"] = {
@@ -152,7 +211,7 @@ def full_seo_audit(url, titles_seen, descs_seen, content_hashes_seen, html):
             "sample_anchors": anchor_texts[:10]
         }
 
-        result["empty_anchor_text_links"] = sum(1 for a in anchor_tags if not a.get_text(strip=True))
+        result["empty_anchor_text_links"] = sum(1 for a in anchor_tags if not a.text)
 
         non_descriptive_phrases = {"click here", "read more", "learn more", "more", "here", "view"}
         result["non_descriptive_anchors"] = sum(
@@ -168,7 +227,8 @@ def full_seo_audit(url, titles_seen, descs_seen, content_hashes_seen, html):
         if len(anchor_tags) <= 1:
             result["single_internal_link"] = True
 
-        http_links = [urljoin(url, a["href"]) for a in anchor_tags if url.startswith("https://") and urljoin(url, a["href"]).startswith("http://")]
+        anchor_urls = [urljoin(url, a.href) for a in anchor_tags]
+        http_links = [link for link in anchor_urls if url.startswith("https://") and link.startswith("http://")]
         if http_links:
             result["http_links_on_https"] = http_links
 
@@ -179,65 +239,55 @@ def full_seo_audit(url, titles_seen, descs_seen, content_hashes_seen, html):
         result["text_to_html_ratio_percent"] = round((len(page_text) / html_size) * 100, 2) if html_size else 0
 
         result["schema"] = {
-            "json_ld_found": bool(soup.find_all("script", {"type": "application/ld+json"})),
-            "microdata_found": bool(soup.find_all(attrs={"itemscope": True}))
+            "json_ld_found": page.json_ld_found,
+            "microdata_found": page.microdata_found
         }
 
-        images = soup.find_all("img")
-        broken_images = []
-        for img in images[:10]:
-            src = img.get("src")
-            if src:
-                img_url = urljoin(url, src)
-                try:
-                    img_resp = requests.head(img_url, timeout=5)
-                    if img_resp.status_code >= 400:
-                        broken_images.append({"src": src, "status": img_resp.status_code})
-                except Exception as e:
-                    broken_images.append({"src": src, "error": str(e)})
-
-        result["images"] = {
-            "total_images": len(images),
-            "images_without_alt": sum(1 for img in images if not img.get("alt")),
-            "sample_images": [{"src": img.get("src"), "alt": img.get("alt")} for img in images[:5]],
-            "broken_images": broken_images
+        # Every image is checked; the crawl-wide checker dedups logos/icons repeated on each page
+        if image_checker is None:
+            image_checker = LinkChecker()
+            own_checkers.append(image_checker)
+        images = page.images
+        image_checks = submit_image_checks(url, [img.get("src") for img in images], image_checker)
+
+        robots_rules = (robots_cache or RobotsCache()).get(url)
+        result["robots_txt"] = {
+            "found": robots_rules.found,
+            "disallows": robots_rules.disallow_lines,
+            "crawl_delay": robots_rules.crawl_delay(),
+            "allows_this_page": robots_rules.can_fetch(url),
         }
 
-        robots_url = f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
-        try:
-            robots_response = requests.get(robots_url, timeout=5)
-            disallows = [line.strip() for line in robots_response.text.splitlines() if line.lower().startswith("disallow")]
-            result["robots_txt"] = {
-                "found": True,
-                "disallows": disallows
-            }
-        except:
-            result["robots_txt"] = {
-                "found": False,
-                "disallows": []
-            }
-
-        meta_robots = soup.find("meta", {"name": "robots"})
-        result["meta_robots"] = meta_robots["content"] if meta_robots and meta_robots.get("content") else ""
+        result["meta_robots"] = page.meta_robots or ""
 
         base_domain = parsed_url.netloc
-        for a in anchor_tags:
-            href = a["href"]
-            full_url = urljoin(url, href)
+        for full_url in anchor_urls:
             if urlparse(full_url).netloc == base_domain and full_url not in visited_urls:
                 visited_urls.add(full_url)
-                try:
-                    head_resp = requests.head(full_url, allow_redirects=True, timeout=5)
-                    if head_resp.status_code >= 400:
-                        internal_errors.append({"url": full_url, "status": head_resp.status_code})
-                except Exception as e:
-                    internal_errors.append({"url": full_url, "error": str(e)})
+                internal_links.append(full_url)
+
+        if link_checker is None:
+            link_checker = LinkChecker()
+            own_checkers.append(link_checker)
+        with timed("link_checks"):
+            internal_errors = link_checker.errors(internal_links)
 
         result["internal_link_errors"] = internal_errors
 
+        result["images"] = {
+            "total_images": len(images),
+            "images_without_alt": sum(1 for img in images if not img.get("alt")),
+            "sample_images": [{"src": img.get("src"), "alt": img.get("alt")} for img in images[:5]],
+            **image_check_results(image_checks),
+        }
+
     except Exception as e:
         result["error"] = str(e)
 
+    finally:
+        for checker in own_checkers:
+            checker.shutdown()
+
     return result
 
 
@@ -295,8 +345,10 @@ Important:
 
 [SEO_REPORT]: {report}
 """
+    return call_gemini(prompt)
 
 
+def call_gemini(prompt):
     api_key = os.getenv("GEMINI_API_KEY")
     url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
 
@@ -316,10 +368,12 @@ Important:
         ]
     }
 
+    response = None
     try:
         response = requests.post(url, headers=headers, json=payload)
         response.raise_for_status()
         data = response.json()
         return data["candidates"][0]["content"]["parts"][0]["text"]
     except Exception as e:
-        return f"❌ Error during Gemini API call: {e}\n\nDetails: {response.text}"
+        details = response.text if response is not None else ""
+        return f"❌ Error during Gemini API call: {e}\n\nDetails: {details}"
@@ -0,0 +1,161 @@
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import THROTTLE_STATUSES, host_rate_limiter
+
+USER_AGENT = "Mozilla/5.0 (compatible; SEOAuditBot/1.0)"
+
+# --- Pooled HTTP Client ---
+class PoliteAdapter(HTTPAdapter):
+    """Connection-pooled adapter that waits for the host's rate limiter before every request,
+    reports each response back to it, and retries 429/503 once the host's pause is over."""
+
+    def __init__(self, rate_limiter=host_rate_limiter, throttle_retries=3, **kwargs):
+        self.rate_limiter = rate_limiter
+        self.throttle_retries = throttle_retries
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        for attempt in range(self.throttle_retries + 1):
+            self.rate_limiter.acquire(request.url)
+            started = time.monotonic()
+            try:
+                response = super().send(request, **kwargs)
+            except requests.RequestException:
+                self.rate_limiter.observe(request.url, None, time.monotonic() - started)
+                raise
+            self.rate_limiter.observe(
+                request.url, response.status_code, response.elapsed.total_seconds(),
+                response.headers.get("Retry-After"),
+            )
+            if response.status_code not in THROTTLE_STATUSES or attempt == self.throttle_retries:
+                return response
+            response.close()
+
+def build_session(pool_size=32):
+    session = requests.Session()
+    adapter = PoliteAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+http_session = build_session()
+
+# Returned instead of HTML for PDFs, images, feeds and other non-HTML responses, so callers
+# can tell "not a page" apart from a fetch that failed (None)
+NOT_HTML = object()
+
+def is_html_response(response):
+    content_type = response.headers.get("Content-Type", "")
+    return not content_type or "html" in content_type.lower()
+
+def fetch_static_html(url, timeout=15):
+    """Plain GET of the server-side HTML, or NOT_HTML for non-HTML responses."""
+    response = http_session.get(url, timeout=timeout)
+    return response.text if is_html_response(response) else NOT_HTML
+
+def conditional_get(url, etag=None, last_modified=None, timeout=15):
+    """GET that lets the server answer 304 Not Modified when the page hasn't changed."""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return http_session.get(url, headers=headers, timeout=timeout)
+
+# --- JS Rendering Heuristic ---
+SPA_ROOT_PATTERN = re.compile(
+    r'<div[^>]+id=["\'](?:root|app|__next|__nuxt|___gatsby)["\'][^>]*>\s*</div>', re.IGNORECASE
+)
+SPA_MARKER_PATTERN = re.compile(r'\bng-app\b|\bdata-reactroot\b|\bdata-server-rendered\b', re.IGNORECASE)
+NOSCRIPT_PATTERN = re.compile(
+    r'<noscript[^>]*>[^<]*(?:enable javascript|requires javascript|javascript is disabled)', re.IGNORECASE
+)
+BODY_PATTERN = re.compile(r'<body[^>]*>(.*)</body>', re.IGNORECASE | re.DOTALL)
+STRIP_PATTERN = re.compile(r'<script\b.*?</script>|<style\b.*?</style>|<[^>]+>', re.IGNORECASE | re.DOTALL)
+
+MIN_VISIBLE_CHARS = 200
+MIN_TEXT_RATIO = 0.02
+
+def needs_js_rendering(html):
+    """Return (needs_js, reason) using cheap string checks on the server-side HTML."""
+    if not html or not html.strip():
+        return True, "empty response"
+
+    body_match = BODY_PATTERN.search(html)
+    body = body_match.group(1) if body_match else html
+    visible_text = " ".join(STRIP_PATTERN.sub(" ", body).split())
+
+    if not visible_text:
+        return True, "empty body"
+    if SPA_ROOT_PATTERN.search(html):
+        return True, "empty SPA root element"
+    if NOSCRIPT_PATTERN.search(html):
+        return True, "noscript asks for JavaScript"
+    if len(visible_text) < MIN_VISIBLE_CHARS and "<script" in body.lower():
+        return True, "little text, script-driven body"
+    if len(visible_text) / len(html) < MIN_TEXT_RATIO and SPA_MARKER_PATTERN.search(html):
+        return True, "low text-to-HTML ratio on a framework page"
+    return False, "server-side HTML is complete"
+
+# --- Learned Per-Domain Decisions ---
+def template_key(url):
+    """Group URLs that most likely share a page template: host plus first path segment."""
+    parsed = urlparse(url)
+    segments = [s for s in parsed.path.split("/") if s]
+    return parsed.netloc, segments[0] if len(segments) > 1 else ""
+
+class RenderDecisionCache:
+    """Remembers whether a template needed JavaScript so later pages skip the probe."""
+
+    def __init__(self):
+        self._decisions = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            return self._decisions.get(template_key(url))
+
+    def record(self, url, needs_js):
+        with self._lock:
+            self._decisions[template_key(url)] = needs_js
+
+render_decisions = RenderDecisionCache()
+
+def fetch_html(url, render, decisions=render_decisions, response=None):
+    """Static-first fetch: only call render(url) when the server HTML looks incomplete.
+
+    A response already downloaded for url (e.g. by an incremental crawl's check) is used
+    as the static probe instead of a second GET.
+    """
+    if decisions.get(url) is True:
+        return render(url)
+
+    if response is None:
+        try:
+            response = http_session.get(url, timeout=15)
+        except requests.RequestException as e:
+            print(f"⚠️ Static fetch failed, falling back to browser: {e}")
+            return render(url)
+    # PDFs, images, feeds...: nothing to render, and nothing to learn about the template
+    if not is_html_response(response):
+        return NOT_HTML
+
+    html = response.text
+    if not response.ok:
+        # Error pages are audited as served and say nothing about how the template renders
+        return html
+    needs_js, reason = needs_js_rendering(html)
+    # Nor does a single empty body
+    if html.strip():
+        decisions.record(url, needs_js)
+    if needs_js:
+        print(f"🧩 JavaScript rendering needed for {url}: {reason}")
+        return render(url)
+    return html
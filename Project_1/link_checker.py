@@ -0,0 +1,79 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from hybrid_fetch import http_session
+
+
+class LinkChecker:
+    """Crawl-scoped link status cache.
+
+    Every distinct URL is HEAD-checked once per ttl seconds. Concurrent callers asking for
+    a URL that is already being checked share the same in-flight future. The same class
+    checks images, where content length and type are what matter.
+    """
+
+    def __init__(self, session=None, ttl=3600, max_workers=16, timeout=5):
+        self.session = session or http_session
+        self.ttl = ttl
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _head(self, url):
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.status_code in (405, 501):
+                # Some servers and CDNs reject HEAD; fall back to a GET without reading the body
+                response = self.session.get(url, allow_redirects=True, timeout=self.timeout, stream=True)
+                response.close()
+            content_length = response.headers.get("Content-Length")
+            return {
+                "url": url,
+                "status": response.status_code,
+                "content_length": int(content_length) if content_length and content_length.isdigit() else None,
+                "content_type": response.headers.get("Content-Type"),
+            }
+        except Exception as e:
+            return {"url": url, "error": str(e)}
+
+    def check(self, url):
+        """Return a future resolving to {"url", "status", "content_length", "content_type"} or {"url", "error"}."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(url)
+            if cached and now - cached[0] < self.ttl:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            future = self._executor.submit(self._head, url)
+            self._cache[url] = (now, future)
+            return future
+
+    def hosts(self):
+        """Every host this checker has sent requests to."""
+        with self._lock:
+            return {urlparse(url).netloc for url in self._cache}
+
+    def check_many(self, urls):
+        futures = {url: self.check(url) for url in urls}
+        return {url: future.result() for url, future in futures.items()}
+
+    def errors(self, urls):
+        """Checked results for urls (in order) that failed or returned 4xx/5xx."""
+        results = self.check_many(urls)
+        failed = []
+        for url in urls:
+            result = results[url]
+            if "error" in result:
+                failed.append({"url": url, "error": result["error"]})
+            elif result["status"] >= 400:
+                failed.append({"url": url, "status": result["status"]})
+        return failed
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,33 +1,18 @@
 import streamlit as st
-from helpers import ai_analysis, display_wrapped_json, full_seo_audit, get_rendered_html
-from urllib.parse import urlparse, urljoin, urlunparse
-from bs4 import BeautifulSoup
-import requests
-import time
-import re
+from crawler import CrawlConfig, parse_path_quotas
+from site_audit import audit_site
+from summarizer import summarize_audit
+from report_model import build_audit_tables, compute_sitewide_metrics, sitewide_images
+from report_viewer import render_crawl_metrics, render_exports, render_report_viewer, reset_report_viewer
 from datetime import datetime
-from xhtml2pdf import pisa
-import io
+from pdf_cache import pdf_cache
 import markdown2
 import pandas as pd
-from collections import defaultdict
-
-# --- Normalize and Clean URLs ---
-def normalize_url(url):
-    parsed = urlparse(url)
-    clean_path = parsed.path.rstrip('/')
-    return urlunparse((parsed.scheme, parsed.netloc, clean_path, '', '', ''))
-
-def is_valid_link(href):
-    return (
-        href and
-        not href.startswith('#') and
-        not href.lower().startswith('javascript')
-    )
 
 # --- Convert Markdown to Styled HTML PDF ---
-def build_html_summary(summary_html: str, site_url: str) -> str:
-    date_str = datetime.now().strftime("%Y-%m-%d %H:%M")
+def build_html_summary(summary_html: str, site_url: str, date_str: str = None) -> str:
+    # Pass the summary's own timestamp so identical reports produce identical HTML (and a cache hit)
+    date_str = date_str or datetime.now().strftime("%Y-%m-%d %H:%M")
     html = f"""
     <!DOCTYPE html>
     <html>
@@ -70,96 +55,29 @@ def markdown_to_html(text):
     return markdown2.markdown(text, extras=["tables", "fenced-code-blocks"])
 
 def convert_to_pdf(html: str) -> bytes:
-    result = io.BytesIO()
-    pisa.CreatePDF(io.StringIO(html), dest=result)
-    return result.getvalue()
-
-# --- Metric Aggregator ---
-def compute_sitewide_metrics(seo_data):
-    metrics_count = defaultdict(int)
-    for page in seo_data:
-        report = page.get("report", {})
-        if report.get("title", {}).get("text", "") == "Missing":
-            metrics_count["Missing Title Tags"] += 1
-        if report.get("description", {}).get("text", "") == "Missing":
-            metrics_count["Missing Meta Descriptions"] += 1
-        if report.get("duplicate_title"):
-            metrics_count["Duplicate Title Tags"] += 1
-        if report.get("duplicate_meta_description"):
-            metrics_count["Duplicate Meta Descriptions"] += 1
-        if report.get("duplicate_content"):
-            metrics_count["Duplicate Content"] += 1
-        if report.get("H1_content", "") == "":
-            metrics_count["H1 Content Missing"] += 1
-        if report.get("headings", {}).get("H1", 0) > 1:
-            metrics_count["Excessive H1 Elements"] += 1
-        if report.get("images", {}).get("images_without_alt", 0):
-            metrics_count["Images Without Alt Attributes"] += report["images"]["images_without_alt"]
-        if report.get("empty_anchor_text_links", 0):
-            metrics_count["Empty Anchor Text Links"] += report["empty_anchor_text_links"]
-        if report.get("word_stats", {}).get("anchor_ratio_percent", 0) > 15:
-            metrics_count["High Anchor Word Ratio (%)"] += 1
-        if not report.get("schema", {}).get("json_ld_found", False):
-            metrics_count["JSON-LD Schema Absent"] += 1
-        if report.get("text_to_html_ratio_percent", 100) < 10:
-            metrics_count["Low Text-to-HTML Ratio (%)"] += 1
-    return pd.DataFrame(metrics_count.items(), columns=["Metric", "Count"])
+    return pdf_cache.render(html)
 
 # --- Crawler Function ---
-def crawl_entire_site(start_url):
-    visited = set()
-    queue = [start_url]
-    all_reports = []
-    total_to_crawl = 1
+def crawl_entire_site(start_url, config=None, resume=True):
     progress_bar = st.progress(0)
     status_text = st.empty()
 
-    # Add duplication trackers here
-    titles_seen = set()
-    descs_seen = set()
-    content_hashes_seen = set()
-
-    while queue:
-        current_index = total_to_crawl - len(queue)
-        current_url = queue.pop(0)
-        normalized_current = normalize_url(current_url)
-
-        if normalized_current in visited:
-            continue
-
-        status_text.text(f"🔍 Auditing {current_url} ({current_index + 1} of approx. {total_to_crawl})")
-
-        try:
-            html = get_rendered_html(current_url)
-            if not html:
-                all_reports.append({"url": current_url, "report": {"error": f"Could not render page: {current_url}"}})
-                continue
-
-            soup = BeautifulSoup(html, "html.parser")
-            visited.add(normalized_current)
-            report = full_seo_audit(current_url, titles_seen, descs_seen, content_hashes_seen, html)
-            all_reports.append({"url": current_url, "report": report})
-
-            base = urlparse(start_url).netloc
-            for a in soup.find_all("a", href=True):
-                href = a["href"]
-                if not is_valid_link(href):
-                    continue
-                full_url = urljoin(current_url, href)
-                normalized_url = normalize_url(full_url)
-                if urlparse(normalized_url).netloc == base and normalized_url not in visited and normalized_url not in queue:
-                    queue.append(normalized_url)
-                    total_to_crawl += 1
-
-            progress_bar.progress((current_index + 1) / total_to_crawl)
-            time.sleep(0.5)
-
-        except Exception as e:
-            all_reports.append({"url": current_url, "error": str(e)})
-
+    def on_progress(progress):
+        if progress.finished:
+            return
+        status_text.text(f"🔍 Audited {progress.current_url} ({progress.pages_done} of approx. {progress.pages_discovered})")
+        progress_bar.progress(min(progress.pages_done / max(progress.pages_discovered, 1), 1.0))
+
+    result = audit_site(start_url, config=config, resume=resume, progress_callback=on_progress)
+    if result.resumed and result.resumed_pages:
+        st.info(f"♻️ Resumed an interrupted crawl: {result.resumed_pages} pages were already audited")
+    if result.blocked_urls:
+        st.info(f"🤖 Skipped {len(result.blocked_urls)} URLs disallowed by robots.txt")
+    if result.non_html_urls:
+        st.info(f"📎 Skipped {len(result.non_html_urls)} linked files that are not HTML pages")
     status_text.text("✅ Crawl completed!")
     progress_bar.progress(1.0)
-    return all_reports
+    return result
 
 # --- Streamlit App ---
 def main():
@@ -168,6 +86,18 @@ def main():
     start_url = st.text_input("Enter the homepage URL (e.g., https://example.com)")
     st.caption("This will crawl all internal pages and analyze them.")
 
+    with st.expander("⚙️ Crawl Settings"):
+        max_concurrency = st.number_input("Pages audited in parallel", min_value=1, max_value=64, value=8)
+        per_host_concurrency = st.number_input("Max parallel requests per host", min_value=1, max_value=64, value=4)
+        max_pages = st.number_input("Max pages (0 = no limit)", min_value=0, value=0)
+        max_depth = st.number_input("Max link depth from the homepage (0 = no limit)", min_value=0, value=0)
+        keep_params = st.text_input("Query parameters to keep (comma-separated, e.g. page, id)",
+                                    help="All other parameters (filters, sorting, tracking) are dropped so facet permutations collapse into one URL")
+        quota_lines = st.text_area("URL pattern quotas (one PATTERN=LIMIT per line)", placeholder="/search*=50\n/products/*=2000")
+        resume = st.checkbox("Resume an interrupted crawl of this site", value=True)
+        incremental = st.checkbox("Incremental re-audit (reuse reports of pages unchanged since the last crawl)", value=False)
+        use_sitemaps = st.checkbox("Seed the crawl from sitemap.xml (finds pages no link points to)", value=True)
+
     if st.button("Start Full Site Audit"):
         if not start_url:
             st.warning("Please enter a valid URL.")
@@ -175,9 +105,29 @@ def main():
         if not start_url.startswith("http://") and not start_url.startswith("https://"):
             start_url = "https://" + start_url.strip()
 
+        try:
+            path_quotas = parse_path_quotas(quota_lines.splitlines())
+        except ValueError as e:
+            st.warning(str(e))
+            return
+
         with st.spinner("Crawling and analyzing site..."):
-            full_report = crawl_entire_site(start_url)
-            st.session_state["seo_data"] = full_report
+            config = CrawlConfig(
+                max_concurrency=int(max_concurrency),
+                per_host_concurrency=int(per_host_concurrency),
+                max_pages=int(max_pages) or None,
+                max_depth=int(max_depth) or None,
+                path_quotas=path_quotas,
+                keep_query_params=tuple(p.strip() for p in keep_params.split(",") if p.strip()),
+                incremental=incremental,
+                use_sitemaps=use_sitemaps,
+            )
+            result = crawl_entire_site(start_url, config, resume=resume)
+            st.session_state["seo_data"] = result.reports
+            st.session_state["duplicate_clusters"] = result.duplicate_clusters
+            st.session_state["crawl_metrics"] = (result.metrics, result.page_timings)
+            st.session_state["audit_tables"] = build_audit_tables(result.reports)
+            reset_report_viewer()
             st.session_state["ai_summary"] = None
             st.session_state["ai_summary_time"] = None
 
@@ -186,40 +136,67 @@ def main():
     if "seo_data" in st.session_state:
         view = st.radio("Choose report view:", ["📊 Raw SEO Report", "🤖 AI SEO Summary"])
 
+        if "audit_tables" not in st.session_state:
+            st.session_state["audit_tables"] = build_audit_tables(st.session_state["seo_data"])
+        tables = st.session_state["audit_tables"]
+
         if view == "📊 Raw SEO Report":
-            display_wrapped_json(st.session_state["seo_data"])
+            render_report_viewer(st.session_state["seo_data"], tables)
+            render_exports(tables)
+            if st.session_state.get("crawl_metrics"):
+                render_crawl_metrics(*st.session_state["crawl_metrics"])
 
         elif view == "🤖 AI SEO Summary":
-            metrics_df = compute_sitewide_metrics(st.session_state["seo_data"])
+            metrics_df = compute_sitewide_metrics(tables.pages)
             st.markdown("### 📊 Full SEO Issue Metrics (Calculated from All Pages)")
             st.dataframe(metrics_df)
 
+            duplicate_clusters = st.session_state.get("duplicate_clusters") or []
+            if duplicate_clusters:
+                st.markdown(f"### 🧬 Duplicate Content Clusters ({len(duplicate_clusters)})")
+                st.dataframe(pd.DataFrame([
+                    {"Type": c["type"], "Pages": c["size"], "URLs": ", ".join(c["urls"][:10])}
+                    for c in duplicate_clusters
+                ]))
+
+            image_issues = sitewide_images(tables.images)
+            if not image_issues.empty:
+                st.markdown(f"### 🖼️ Broken & Heavy Images ({len(image_issues)} unique)")
+                st.dataframe(image_issues, hide_index=True)
+
             if st.button("♻️ Regenerate AI Summary"):
                 with st.spinner("Regenerating..."):
-                    st.session_state["ai_summary"] = ai_analysis(st.session_state["seo_data"])
+                    st.session_state["ai_summary"] = summarize_audit(st.session_state["seo_data"])
                     st.session_state["ai_summary_time"] = datetime.now().strftime("%d %b %Y, %I:%M %p")
             elif "ai_summary" not in st.session_state or st.session_state["ai_summary"] is None:
                 with st.spinner("Generating summary..."):
-                    st.session_state["ai_summary"] = ai_analysis(st.session_state["seo_data"])
+                    st.session_state["ai_summary"] = summarize_audit(st.session_state["seo_data"])
                     st.session_state["ai_summary_time"] = datetime.now().strftime("%d %b %Y, %I:%M %p")
 
             raw_summary = st.session_state["ai_summary"]
             generated_time = st.session_state.get("ai_summary_time", "")
             html_friendly = markdown_to_html(raw_summary)
-            html = build_html_summary(html_friendly, start_url)
+            html = build_html_summary(html_friendly, start_url, generated_time)
 
             st.markdown("### 🧠 AI SEO Summary Preview")
             if generated_time:
                 st.caption(f"Last generated: {generated_time}")
             st.markdown(raw_summary)
 
-            pdf_bytes = convert_to_pdf(html)
-            st.download_button(
-                label="📥 Download SEO Summary as PDF",
-                data=pdf_bytes,
-                file_name="seo_summary.pdf",
-                mime="application/pdf"
-            )
+            # Rendered in the background and cached by content; only waited on when requested
+            pdf_bytes = pdf_cache.get(html)
+            if pdf_bytes is None:
+                pdf_cache.prefetch(html)
+                if st.button("📄 Prepare PDF Download"):
+                    with st.spinner("Building PDF..."):
+                        pdf_bytes = convert_to_pdf(html)
+            if pdf_bytes is not None:
+                st.download_button(
+                    label="📥 Download SEO Summary as PDF",
+                    data=pdf_bytes,
+                    file_name="seo_summary.pdf",
+                    mime="application/pdf"
+                )
 
 if __name__ == "__main__":
     main()  
\ No newline at end of file
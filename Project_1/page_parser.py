@@ -0,0 +1,133 @@
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+HIDDEN_TEXT_TAGS = {"script", "style", "template"}
+HEADING_TAGS = {f"h{i}" for i in range(1, 7)}
+
+
+@dataclass
+class Anchor:
+    href: str
+    text: str = ""
+
+@dataclass
+class ParsedPage:
+    title: Optional[str] = None
+    meta_description: Optional[str] = None
+    meta_robots: Optional[str] = None
+    headings: Dict[str, int] = field(default_factory=lambda: {f"H{i}": 0 for i in range(1, 7)})
+    h1_text: Optional[str] = None
+    anchors: List[Anchor] = field(default_factory=list)
+    images: List[dict] = field(default_factory=list)
+    json_ld_found: bool = False
+    microdata_found: bool = False
+    text_strings: List[str] = field(default_factory=list)
+    total_words: int = 0
+
+    @property
+    def page_text(self):
+        return " ".join(self.text_strings)
+
+
+class _SinglePassParser(HTMLParser):
+    """Event-based extractor: one walk over the markup collects everything the audit needs."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.page = ParsedPage()
+        self._hidden_depth = 0
+        self._in_title = False
+        self._title_parts = None
+        self._h1_depth = 0
+        self._h1_parts = None
+        self._anchor = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if "itemscope" in attributes:
+            self.page.microdata_found = True
+
+        if tag in HIDDEN_TEXT_TAGS:
+            self._hidden_depth += 1
+            if tag == "script" and attributes.get("type") == "application/ld+json":
+                self.page.json_ld_found = True
+        elif tag == "title" and self.page.title is None:
+            self._in_title = True
+            self._title_parts = []
+        elif tag == "meta":
+            self._handle_meta(attributes)
+        elif tag in HEADING_TAGS:
+            self.page.headings[tag.upper()] += 1
+            if tag == "h1":
+                self._h1_depth += 1
+                if self.page.h1_text is None and self._h1_parts is None:
+                    self._h1_parts = []
+        elif tag == "a" and "href" in attributes:
+            self._anchor = Anchor(href=attributes["href"] or "")
+            self._anchor_parts = []
+            self.page.anchors.append(self._anchor)
+        elif tag == "img":
+            self.page.images.append({"src": attributes.get("src"), "alt": attributes.get("alt")})
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in ("meta", "img"):
+            self.handle_endtag(tag)
+
+    def _handle_meta(self, attributes):
+        name = (attributes.get("name") or "").lower()
+        content = attributes.get("content")
+        if name == "description" and self.page.meta_description is None:
+            self.page.meta_description = content or ""
+        elif name == "robots" and self.page.meta_robots is None:
+            self.page.meta_robots = content or ""
+
+    def handle_endtag(self, tag):
+        if tag in HIDDEN_TEXT_TAGS:
+            self._hidden_depth = max(self._hidden_depth - 1, 0)
+        elif tag == "title" and self._in_title:
+            self._in_title = False
+            self.page.title = "".join(self._title_parts)
+        elif tag == "h1" and self._h1_depth:
+            self._h1_depth -= 1
+            if not self._h1_depth and self._h1_parts is not None:
+                self.page.h1_text = "".join(self._h1_parts)
+                self._h1_parts = None
+        elif tag == "a" and self._anchor is not None:
+            self._anchor.text = "".join(self._anchor_parts)
+            self._anchor = None
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+        if self._hidden_depth:
+            return
+        if self._h1_parts is not None:
+            self._h1_parts.append(data)
+        stripped = data.strip()
+        if not stripped:
+            return
+        if self._anchor is not None:
+            self._anchor_parts.append(stripped)
+        self.page.text_strings.append(stripped)
+        self.page.total_words += len(WORD_PATTERN.findall(stripped))
+
+    def close(self):
+        super().close()
+        # Unclosed elements at end of document still count
+        if self._in_title:
+            self.page.title = "".join(self._title_parts)
+        if self._h1_parts is not None:
+            self.page.h1_text = "".join(self._h1_parts)
+        if self._anchor is not None:
+            self._anchor.text = "".join(self._anchor_parts)
+
+
+def parse_page(html):
+    parser = _SinglePassParser()
+    parser.feed(html or "")
+    parser.close()
+    return parser.page
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from crawl_metrics import record
+
+# Requests per second per host: where every host starts, and the most any host is allowed
+INITIAL_RATE = float(os.getenv("CRAWL_RATE", 2))
+MAX_RATE = float(os.getenv("CRAWL_MAX_RATE", 10))
+MIN_RATE = 0.1
+# Responses slower than this (smoothed) mean the host is struggling
+TARGET_LATENCY = 1.5
+LATENCY_SMOOTHING = 0.2
+RATE_INCREASE = 0.5
+SLOW_DECREASE = 0.8
+THROTTLED_DECREASE = 0.5
+MAX_BACKOFF = 120.0
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class HostState:
+    """Token bucket plus AIMD rate control for one host."""
+
+    def __init__(self, rate, ceiling):
+        self.rate = rate
+        self.ceiling = ceiling
+        self.capacity = max(rate, 1.0)
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.backoff = 0.0
+        self.latency = None
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def reserve(self, now):
+        """Take a token, going into debt if none is left; returns how long the caller must wait."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = max(self.paused_until - now, 0.0)
+        if self.tokens < 0:
+            wait = max(wait, -self.tokens / self.rate)
+        return wait
+
+    def set_rate(self, rate):
+        self.rate = min(max(rate, MIN_RATE), self.ceiling)
+
+
+class HostRateLimiter:
+    """Per-host politeness shared by every request the crawler makes.
+
+    Each host gets a token bucket whose rate grows additively while responses are fast
+    and shrinks multiplicatively when latency rises or the host answers 429/503, which
+    also pauses the host for Retry-After or an exponential backoff. Crawl-delay from
+    robots.txt caps the rate.
+    """
+
+    def __init__(self, initial_rate=INITIAL_RATE, max_rate=MAX_RATE):
+        self.initial_rate = initial_rate
+        self.max_rate = max_rate
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        host = urlparse(url).netloc
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(min(self.initial_rate, self.max_rate), self.max_rate)
+        return state
+
+    def acquire(self, url):
+        """Block until the host of url may receive another request."""
+        with self._lock:
+            state = self._host(url)
+            wait = state.reserve(time.monotonic())
+            state.requests += 1
+            state.waited += wait
+        if wait > 0:
+            record("rate_limit_wait", wait)
+            time.sleep(wait)
+
+    def set_crawl_delay(self, url, delay):
+        if not delay:
+            return
+        with self._lock:
+            state = self._host(url)
+            state.ceiling = min(self.max_rate, 1.0 / delay)
+            state.capacity = 1.0  # no bursts for hosts that ask for a delay
+            state.set_rate(state.rate)
+
+    def observe(self, url, status=None, latency=None, retry_after=None):
+        """Adapt the host's rate to one response (status None for timeouts/connection errors)."""
+        with self._lock:
+            state = self._host(url)
+            if status in THROTTLE_STATUSES:
+                state.throttled += 1
+                state.set_rate(state.rate * THROTTLED_DECREASE)
+                state.backoff = min(max(state.backoff * 2, 1.0), MAX_BACKOFF)
+                pause = parse_retry_after(retry_after)
+                pause = min(pause, MAX_BACKOFF) if pause is not None else state.backoff
+                state.paused_until = max(state.paused_until, time.monotonic() + pause)
+                return
+            if latency is None:
+                return
+            state.backoff = 0.0
+            state.latency = latency if state.latency is None else (
+                LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * state.latency
+            )
+            if status is None or state.latency > TARGET_LATENCY:
+                state.set_rate(state.rate * SLOW_DECREASE)
+            else:
+                state.set_rate(state.rate + RATE_INCREASE)
+
+    def stats(self):
+        with self._lock:
+            return {
+                host: {
+                    "rate": round(state.rate, 2),
+                    "requests": state.requests,
+                    "throttled": state.throttled,
+                    "waited_seconds": round(state.waited, 2),
+                    "latency": round(state.latency, 3) if state.latency is not None else None,
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+host_rate_limiter = HostRateLimiter()
@@ -0,0 +1,197 @@
+import io
+from dataclasses import dataclass
+from urllib.parse import urljoin
+
+import pandas as pd
+
+# --- Fixed Schema ---
+# One row per audited page, scalar metrics only; repeated values are stored as categories
+PAGE_SCHEMA = {
+    "url": "string",
+    "error": "string",
+    "title": "string",
+    "title_length": "int32",
+    "description_length": "int32",
+    "missing_title": "bool",
+    "missing_description": "bool",
+    "duplicate_title": "bool",
+    "duplicate_description": "bool",
+    "duplicate_content": "bool",
+    "near_duplicate": "bool",
+    "h1_count": "int16",
+    "h2_count": "int16",
+    "h3_count": "int16",
+    "h1_missing": "bool",
+    "h1_same_as_title": "bool",
+    "total_words": "int32",
+    "anchor_words": "int32",
+    "anchor_ratio_percent": "float32",
+    "empty_anchor_links": "int32",
+    "non_descriptive_anchors": "int32",
+    "text_to_html_ratio_percent": "float32",
+    "json_ld_found": "bool",
+    "microdata_found": "bool",
+    "total_images": "int32",
+    "images_without_alt": "int32",
+    "broken_images": "int32",
+    "heavy_images": "int32",
+    "total_image_bytes": "int64",
+    "internal_link_errors": "int32",
+    "using_https": "bool",
+    "meta_robots": "category",
+    "unchanged_since_last_audit": "bool",
+}
+
+LINK_SCHEMA = {"page_url": "string", "link_url": "string", "status": "Int16", "error": "string"}
+IMAGE_SCHEMA = {
+    "page_url": "string", "image_url": "string", "issue": "category",
+    "status": "Int16", "error": "string", "bytes": "Int64", "content_type": "string",
+}
+
+
+@dataclass
+class AuditTables:
+    pages: pd.DataFrame   # PAGE_SCHEMA
+    links: pd.DataFrame   # broken internal links, LINK_SCHEMA
+    images: pd.DataFrame  # broken and heavy images, IMAGE_SCHEMA
+
+
+def _page_row(url, report):
+    title = report.get("title", {})
+    description = report.get("description", {})
+    headings = report.get("headings", {})
+    word_stats = report.get("word_stats", {})
+    images = report.get("images", {})
+    schema = report.get("schema", {})
+    return {
+        "url": url,
+        "error": report.get("error"),
+        "title": title.get("text"),
+        "title_length": title.get("length", 0),
+        "description_length": description.get("length", 0),
+        "missing_title": title.get("text", "") == "Missing",
+        "missing_description": description.get("text", "") == "Missing",
+        "duplicate_title": bool(report.get("duplicate_title")),
+        "duplicate_description": bool(report.get("duplicate_meta_description")),
+        "duplicate_content": bool(report.get("duplicate_content")),
+        "near_duplicate": bool(report.get("near_duplicate_of")),
+        "h1_count": headings.get("H1", 0),
+        "h2_count": headings.get("H2", 0),
+        "h3_count": headings.get("H3", 0),
+        "h1_missing": report.get("H1_content", "") == "",
+        "h1_same_as_title": bool(report.get("h1_title_duplicate")),
+        "total_words": word_stats.get("total_words", 0),
+        "anchor_words": word_stats.get("anchor_words", 0),
+        "anchor_ratio_percent": word_stats.get("anchor_ratio_percent", 0),
+        "empty_anchor_links": report.get("empty_anchor_text_links", 0),
+        "non_descriptive_anchors": report.get("non_descriptive_anchors", 0),
+        "text_to_html_ratio_percent": report.get("text_to_html_ratio_percent", 100),
+        "json_ld_found": schema.get("json_ld_found", False),
+        "microdata_found": schema.get("microdata_found", False),
+        "total_images": images.get("total_images", 0),
+        "images_without_alt": images.get("images_without_alt", 0),
+        "broken_images": len(images.get("broken_images", [])),
+        "heavy_images": len(images.get("heavy_images", [])),
+        "total_image_bytes": images.get("total_image_bytes", 0),
+        "internal_link_errors": len(report.get("internal_link_errors", [])),
+        "using_https": report.get("https_info", {}).get("using_https", False),
+        "meta_robots": report.get("meta_robots", ""),
+        "unchanged_since_last_audit": bool(report.get("unchanged_since_last_audit")),
+    }
+
+
+def _table(rows, schema):
+    return pd.DataFrame(rows, columns=list(schema)).astype(schema)
+
+
+def build_audit_tables(seo_data):
+    """Flatten the crawl's nested page reports into typed, columnar tables."""
+    page_rows, link_rows, image_rows = [], [], []
+    for page in seo_data:
+        url = page.get("url")
+        report = page.get("report") or {"error": page.get("error")}
+        page_rows.append(_page_row(url, report))
+        for link in report.get("internal_link_errors", []):
+            link_rows.append({"page_url": url, "link_url": link.get("url"),
+                              "status": link.get("status"), "error": link.get("error")})
+        for image in report.get("images", {}).get("broken_images", []):
+            image_rows.append({"page_url": url, "image_url": urljoin(url or "", image.get("src", "")), "issue": "broken",
+                               "status": image.get("status"), "error": image.get("error")})
+        for image in report.get("images", {}).get("heavy_images", []):
+            image_rows.append({"page_url": url, "image_url": urljoin(url or "", image.get("src", "")), "issue": "heavy",
+                               "bytes": image.get("bytes"), "content_type": image.get("content_type")})
+    return AuditTables(
+        pages=_table(page_rows, PAGE_SCHEMA),
+        links=_table(link_rows, LINK_SCHEMA),
+        images=_table(image_rows, IMAGE_SCHEMA),
+    )
+
+
+# --- Issues & Sitewide Metrics ---
+# Metric name -> per-page value; booleans count pages, integers are summed
+ISSUE_COLUMNS = {
+    "Missing Title Tags": lambda p: p["missing_title"],
+    "Missing Meta Descriptions": lambda p: p["missing_description"],
+    "Duplicate Title Tags": lambda p: p["duplicate_title"],
+    "Duplicate Meta Descriptions": lambda p: p["duplicate_description"],
+    "Duplicate Content": lambda p: p["duplicate_content"],
+    "Near-Duplicate Content": lambda p: p["near_duplicate"],
+    "H1 Content Missing": lambda p: p["h1_missing"],
+    "Excessive H1 Elements": lambda p: p["h1_count"] > 1,
+    "Images Without Alt Attributes": lambda p: p["images_without_alt"],
+    "Empty Anchor Text Links": lambda p: p["empty_anchor_links"],
+    "High Anchor Word Ratio (%)": lambda p: p["anchor_ratio_percent"] > 15,
+    "JSON-LD Schema Absent": lambda p: ~p["json_ld_found"],
+    "Low Text-to-HTML Ratio (%)": lambda p: p["text_to_html_ratio_percent"] < 10,
+    "Broken Internal Links": lambda p: p["internal_link_errors"],
+    "Broken Images": lambda p: p["broken_images"],
+    "Heavy Images (>300 KB)": lambda p: p["heavy_images"],
+    "Page Errors": lambda p: p["error"].notna(),
+}
+
+
+def compute_sitewide_metrics(pages):
+    counts = {name: int(column(pages).sum()) for name, column in ISSUE_COLUMNS.items()}
+    return pd.DataFrame(
+        [(name, count) for name, count in counts.items() if count],
+        columns=["Metric", "Count"],
+    )
+
+
+def sitewide_images(images):
+    """One row per distinct broken/heavy image with the number of pages that use it."""
+    if images.empty:
+        return pd.DataFrame(columns=["image_url", "issue", "status", "bytes", "content_type", "pages"])
+    return (
+        images.groupby(["image_url", "issue"], observed=True, dropna=False)
+        .agg(status=("status", "first"), bytes=("bytes", "first"),
+             content_type=("content_type", "first"), pages=("page_url", "nunique"))
+        .reset_index()
+        .sort_values(["pages", "bytes"], ascending=False, na_position="last")
+    )
+
+
+def filter_pages(pages, issue=None, url_prefix=None, has_error=None):
+    mask = pd.Series(True, index=pages.index)
+    if issue:
+        mask &= ISSUE_COLUMNS[issue](pages).astype(bool)
+    if url_prefix:
+        mask &= pages["url"].str.startswith(url_prefix, na=False)
+    if has_error is not None:
+        mask &= pages["error"].notna() == has_error
+    return pages[mask]
+
+
+# --- Export ---
+def to_csv_bytes(df):
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def to_parquet_bytes(df):
+    """Parquet export; returns None when no parquet engine (pyarrow/fastparquet) is installed."""
+    buffer = io.BytesIO()
+    try:
+        df.to_parquet(buffer, index=False)
+    except ImportError:
+        return None
+    return buffer.getvalue()
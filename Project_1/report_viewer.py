@@ -0,0 +1,118 @@
+import json
+import math
+
+import pandas as pd
+import streamlit as st
+
+from helpers import wrapped_json
+from report_model import ISSUE_COLUMNS, filter_pages, to_csv_bytes, to_parquet_bytes
+
+SUMMARY_COLUMNS = [
+    "url", "error", "title", "total_words", "h1_count", "images_without_alt",
+    "internal_link_errors", "broken_images", "heavy_images", "duplicate_title", "duplicate_content", "near_duplicate",
+]
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def _cached(key, build):
+    # Serialization happens once per crawl result, not on every Streamlit rerun
+    cache = st.session_state.setdefault("report_viewer_cache", {})
+    if key not in cache:
+        cache[key] = build()
+    return cache[key]
+
+
+def reset_report_viewer():
+    """Call when a new crawl result replaces the stored one."""
+    st.session_state.pop("report_viewer_cache", None)
+    st.session_state["viewer_page"] = 1
+
+
+def render_report_viewer(seo_data, tables):
+    """Paginated, filterable view of the crawl; full JSON is only rendered for the selected page."""
+    pages = tables.pages
+
+    col1, col2, col3 = st.columns([2, 1, 2])
+    with col1:
+        issue = st.selectbox("Issue", ["All pages"] + list(ISSUE_COLUMNS))
+    with col2:
+        status = st.selectbox("Status", ["All", "OK", "Errors"])
+    with col3:
+        url_prefix = st.text_input("URL prefix", placeholder="e.g. https://example.com/products")
+
+    filtered = filter_pages(
+        pages,
+        issue=None if issue == "All pages" else issue,
+        url_prefix=url_prefix.strip() or None,
+        has_error={"All": None, "OK": False, "Errors": True}[status],
+    )
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1)
+    page_count = max(math.ceil(len(filtered) / page_size), 1)
+    # Filters can shrink the result below the page the user was on
+    if st.session_state.get("viewer_page", 1) > page_count:
+        st.session_state["viewer_page"] = page_count
+    with col2:
+        page_number = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, key="viewer_page")
+
+    start = (page_number - 1) * page_size
+    visible = filtered.iloc[start:start + page_size]
+    st.caption(f"{len(filtered)} of {len(pages)} pages match")
+    st.dataframe(visible[SUMMARY_COLUMNS], use_container_width=True, hide_index=True)
+
+    if visible.empty:
+        return
+    selected = st.selectbox("Page details", visible.index, format_func=lambda i: pages.at[i, "url"])
+    with st.expander("Full page report", expanded=True):
+        st.code(_cached(("page", selected), lambda: wrapped_json(seo_data[selected])), language="json")
+
+
+def render_exports(tables):
+    st.markdown("### 📥 Export Page Metrics")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("Download CSV", data=_cached("csv", lambda: to_csv_bytes(tables.pages)),
+                           file_name="seo_pages.csv", mime="text/csv")
+    parquet_bytes = _cached("parquet", lambda: to_parquet_bytes(tables.pages))
+    if parquet_bytes is not None:
+        with col2:
+            st.download_button("Download Parquet", data=parquet_bytes,
+                               file_name="seo_pages.parquet", mime="application/octet-stream")
+
+
+def render_crawl_metrics(summary, page_timings):
+    """Where the crawl spent its time, so it's clear which stage to scale."""
+    with st.expander("⏱️ Crawl Performance"):
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Pages", summary.get("pages", 0))
+        col2.metric("Pages / sec", summary.get("pages_per_second", 0))
+        col3.metric("Elapsed (s)", summary.get("elapsed_seconds", 0))
+        col4.metric("Max queue", summary.get("max_queue_size", 0))
+
+        stages = summary.get("stages", {})
+        if stages:
+            st.markdown("**Time per stage (seconds)**")
+            st.dataframe(pd.DataFrame.from_dict(stages, orient="index"), use_container_width=True)
+
+        caches = {
+            name: summary[key] for name, key in
+            [("Link checks", "link_check_cache"), ("Image checks", "image_check_cache")] if summary.get(key)
+        }
+        if caches:
+            st.markdown("**Cache hit rates**")
+            st.dataframe(pd.DataFrame.from_dict(caches, orient="index"), use_container_width=True)
+        if summary.get("browser_pool"):
+            st.markdown("**Browser pool**")
+            st.json(summary["browser_pool"])
+        if summary.get("rate_limits"):
+            st.markdown("**Per-host rate limits**")
+            st.dataframe(pd.DataFrame.from_dict(summary["rate_limits"], orient="index"), use_container_width=True)
+        if summary.get("slowest_pages"):
+            st.markdown("**Slowest pages**")
+            st.dataframe(pd.DataFrame(summary["slowest_pages"]), use_container_width=True, hide_index=True)
+
+        metrics_json = _cached("metrics", lambda: json.dumps({"summary": summary, "pages": page_timings}, indent=2))
+        st.download_button("Download metrics (JSON)", data=metrics_json,
+                           file_name="crawl_metrics.json", mime="application/json")
@@ -0,0 +1,143 @@
+import re
+import threading
+from urllib.parse import urlparse
+
+from hybrid_fetch import USER_AGENT, http_session
+
+ROBOTS_AGENT = "SEOAuditBot"
+
+
+def _pattern_to_regex(pattern):
+    # Robots patterns: "*" matches any run of characters, a trailing "$" anchors the end
+    anchored = pattern.endswith("$")
+    if anchored:
+        pattern = pattern[:-1]
+    regex = ".*".join(re.escape(part) for part in pattern.split("*"))
+    return re.compile(regex + ("$" if anchored else ""))
+
+
+class RobotsGroup:
+    def __init__(self, agents):
+        self.agents = agents
+        self.rules = []  # (pattern, allow, compiled)
+        self.crawl_delay = None
+
+    def add_rule(self, pattern, allow):
+        self.rules.append((pattern, allow, _pattern_to_regex(pattern)))
+
+    def is_allowed(self, path):
+        # Longest matching pattern wins; Allow beats Disallow on a tie
+        best_length, allowed = -1, True
+        for pattern, allow, compiled in self.rules:
+            if compiled.match(path):
+                length = len(pattern)
+                if length > best_length or (length == best_length and allow):
+                    best_length, allowed = length, allow
+        return allowed
+
+
+class RobotsRules:
+    """Parsed robots.txt: user-agent groups, Allow/Disallow with wildcards, Crawl-delay, Sitemaps."""
+
+    def __init__(self, text="", found=True):
+        self.found = found
+        self.groups = []
+        self.sitemaps = []
+        self.disallow_lines = []
+        self._parse(text)
+
+    def _parse(self, text):
+        group = None
+        last_was_agent = False
+        for raw_line in text.splitlines():
+            line = raw_line.split("#", 1)[0].strip()
+            if ":" not in line:
+                continue
+            field, value = (part.strip() for part in line.split(":", 1))
+            field = field.lower()
+
+            if field == "user-agent":
+                if group is None or not last_was_agent:
+                    group = RobotsGroup([])
+                    self.groups.append(group)
+                group.agents.append(value.lower())
+                last_was_agent = True
+                continue
+            last_was_agent = False
+
+            if field == "sitemap":
+                self.sitemaps.append(value)
+            elif group is None:
+                continue
+            elif field == "disallow":
+                self.disallow_lines.append(line)
+                if value:
+                    group.add_rule(value, allow=False)
+            elif field == "allow":
+                if value:
+                    group.add_rule(value, allow=True)
+            elif field == "crawl-delay":
+                try:
+                    group.crawl_delay = float(value)
+                except ValueError:
+                    pass
+
+    def group_for(self, agent=ROBOTS_AGENT):
+        agent = agent.lower()
+        best, best_length = None, -1
+        for group in self.groups:
+            for name in group.agents:
+                if name == "*" and best_length < 0:
+                    best, best_length = group, 0
+                elif name != "*" and name in agent and len(name) > best_length:
+                    best, best_length = group, len(name)
+        return best
+
+    def can_fetch(self, url, agent=ROBOTS_AGENT):
+        group = self.group_for(agent)
+        if group is None:
+            return True
+        parsed = urlparse(url)
+        path = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+        return group.is_allowed(path)
+
+    def crawl_delay(self, agent=ROBOTS_AGENT):
+        group = self.group_for(agent)
+        return group.crawl_delay if group else None
+
+
+class RobotsCache:
+    """Fetches and parses robots.txt once per host for the lifetime of a crawl."""
+
+    def __init__(self, session=None, timeout=5):
+        self.session = session or http_session
+        self.timeout = timeout
+        self._rules = {}
+        self._host_locks = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, origin):
+        try:
+            response = self.session.get(f"{origin}/robots.txt", timeout=self.timeout,
+                                        headers={"User-Agent": USER_AGENT})
+        except Exception:
+            return RobotsRules(found=False)
+        if response.status_code >= 400:
+            # A missing or unreadable robots.txt places no restrictions on crawling
+            return RobotsRules(found=False)
+        return RobotsRules(response.text)
+
+    def get(self, url):
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        with self._lock:
+            if origin in self._rules:
+                return self._rules[origin]
+            host_lock = self._host_locks.setdefault(origin, threading.Lock())
+        # Only one thread downloads a given host's robots.txt; the rest wait for it
+        with host_lock:
+            if origin not in self._rules:
+                rules = self._fetch(origin)
+                with self._lock:
+                    self._rules[origin] = rules
+        return self._rules[origin]
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from crawl_metrics import write_metrics
+from crawl_store import CRAWL_STATE_DIR, CrawlStore, site_key
+from crawler import CrawlConfig, CrawlEngine, CrawlProgress
+
+# --- UI-independent Audit API ---
+@dataclass
+class SiteAuditResult:
+    start_url: str
+    reports: List[dict] = field(default_factory=list)
+    duplicate_clusters: List[dict] = field(default_factory=list)
+    blocked_urls: List[str] = field(default_factory=list)
+    non_html_urls: List[str] = field(default_factory=list)  # linked files (PDFs, images...), not audited
+    metrics: dict = field(default_factory=dict)        # crawl performance summary
+    page_timings: List[dict] = field(default_factory=list)  # per-page stage timings (metrics file only)
+    resumed: bool = False
+    resumed_pages: int = 0   # pages already audited before this run picked the crawl up
+    error: Optional[str] = None
+    started_at: str = ""
+    finished_at: str = ""
+
+
+def normalize_start_url(start_url):
+    start_url = start_url.strip()
+    if not start_url.startswith("http://") and not start_url.startswith("https://"):
+        start_url = "https://" + start_url
+    return start_url
+
+
+def _new_engine(start_url, config, resume, progress_callback, state_dir, global_limit=None):
+    store = CrawlStore.for_site(start_url, state_dir)
+    engine = CrawlEngine(start_url, config=config, progress_callback=progress_callback,
+                         store=store, global_limit=global_limit, resume=resume)
+    return engine, store
+
+
+def _result(engine, started_at):
+    return SiteAuditResult(
+        start_url=engine.start_url,
+        reports=engine.reports,
+        duplicate_clusters=engine.content_index.clusters(),
+        blocked_urls=engine.blocked_urls,
+        non_html_urls=engine.non_html_urls,
+        metrics=engine.metrics.summary(),
+        page_timings=engine.metrics.pages,
+        resumed=engine.resumed,
+        resumed_pages=engine.resumed_pages,
+        started_at=started_at,
+        finished_at=datetime.now().isoformat(timespec="seconds"),
+    )
+
+
+async def audit_site_async(
+    start_url: str,
+    config: Optional[CrawlConfig] = None,
+    resume: bool = True,
+    progress_callback: Optional[Callable[[CrawlProgress], None]] = None,
+    state_dir: str = CRAWL_STATE_DIR,
+    global_limit: Optional[asyncio.Semaphore] = None,
+) -> SiteAuditResult:
+    started_at = datetime.now().isoformat(timespec="seconds")
+    engine, store = _new_engine(start_url, config, resume, progress_callback, state_dir, global_limit)
+    try:
+        await engine.crawl()
+    finally:
+        store.close()
+    return _result(engine, started_at)
+
+
+def audit_site(start_url, config=None, resume=True, progress_callback=None, state_dir=CRAWL_STATE_DIR):
+    """Crawl and audit one site; progress is reported through progress_callback only."""
+    return asyncio.run(audit_site_async(start_url, config, resume, progress_callback, state_dir))
+
+
+async def audit_sites_async(
+    start_urls: List[str],
+    config: Optional[CrawlConfig] = None,
+    max_sites_in_parallel: int = 4,
+    max_pages_in_flight: int = 32,
+    resume: bool = True,
+    progress_callback: Optional[Callable[[CrawlProgress], None]] = None,
+    result_callback: Optional[Callable[[SiteAuditResult], None]] = None,
+    state_dir: str = CRAWL_STATE_DIR,
+) -> List[SiteAuditResult]:
+    """Audit many sites concurrently under one global budget of pages in flight.
+
+    Start URLs that map to the same state file (see site_key) are crawled once.
+    """
+    unique = {}
+    for url in start_urls:
+        unique.setdefault(site_key(url), url)
+    start_urls = list(unique.values())
+    site_limit = asyncio.Semaphore(max_sites_in_parallel)
+    page_limit = asyncio.Semaphore(max_pages_in_flight)
+
+    async def run_one(start_url):
+        async with site_limit:
+            try:
+                result = await audit_site_async(start_url, config, resume, progress_callback, state_dir, page_limit)
+            except Exception as e:
+                result = SiteAuditResult(start_url=start_url, error=str(e))
+            if result_callback:
+                result_callback(result)
+            return result
+
+    return await asyncio.gather(*(run_one(url) for url in start_urls))
+
+
+def audit_sites(start_urls, **kwargs):
+    return asyncio.run(audit_sites_async(start_urls, **kwargs))
+
+
+# --- Report Files ---
+def report_path(output_dir, start_url, suffix=".json"):
+    return os.path.join(output_dir, f"{site_key(start_url)}{suffix}")
+
+
+def write_report(result: SiteAuditResult, output_dir: str) -> str:
+    os.makedirs(output_dir, exist_ok=True)
+    path = report_path(output_dir, result.start_url)
+    # Write then rename so a half-written file never replaces last night's report
+    tmp_path = path + ".tmp"
+    report = asdict(result)
+    report.pop("page_timings")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_metrics_file(result: SiteAuditResult, output_dir: str) -> str:
+    """<site>.metrics.json next to the report: crawl summary plus per-page stage timings."""
+    return write_metrics(result.metrics, result.page_timings, report_path(output_dir, result.start_url, ".metrics.json"))
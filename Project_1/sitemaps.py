@@ -0,0 +1,93 @@
+import gzip
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin, urlparse
+
+from hybrid_fetch import http_session
+
+# Caps a runaway (or malicious) sitemap index; the protocol allows 50,000 URLs per file
+MAX_SITEMAP_FILES = 200
+SEED_BATCH_SIZE = 1000
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _open_stream(response):
+    """File-like body of a sitemap response, transparently gunzipping .xml.gz files."""
+    response.raw.decode_content = True  # Content-Encoding: gzip
+    content_type = response.headers.get("Content-Type", "").lower()
+    # A gzip *file* (sitemap.xml.gz) is still compressed after transfer decoding
+    if urlparse(response.url).path.endswith(".gz") or "gzip" in content_type:
+        return gzip.GzipFile(fileobj=response.raw)
+    return response.raw
+
+
+def parse_sitemap(stream):
+    """Stream (kind, loc, lastmod) out of a urlset or sitemapindex without loading it whole.
+
+    kind is "url" for pages and "sitemap" for child sitemaps of an index.
+    """
+    loc = lastmod = None
+    for event, elem in ET.iterparse(stream, events=("end",)):
+        name = _local_name(elem.tag)
+        if name == "loc":
+            loc = (elem.text or "").strip()
+        elif name == "lastmod":
+            lastmod = (elem.text or "").strip() or None
+        elif name in ("url", "sitemap"):
+            if loc:
+                yield name, loc, lastmod
+            loc = lastmod = None
+            # Drop finished entries so memory stays flat on 50k-URL files
+            elem.clear()
+
+
+def sitemap_candidates(start_url, robots_rules=None):
+    """Sitemaps declared in robots.txt, or the conventional /sitemap.xml."""
+    declared = list(robots_rules.sitemaps) if robots_rules is not None else []
+    return declared or [urljoin(start_url, "/sitemap.xml")]
+
+
+def iter_sitemap_urls(sitemap_urls, session=None, timeout=15, max_files=MAX_SITEMAP_FILES):
+    """Yield (page URL, lastmod) from sitemaps, following sitemap indexes breadth-first."""
+    session = session or http_session
+    pending = list(sitemap_urls)
+    visited = set()
+    while pending and len(visited) < max_files:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in visited:
+            continue
+        visited.add(sitemap_url)
+        try:
+            response = session.get(sitemap_url, timeout=timeout, stream=True)
+        except Exception:
+            continue
+        try:
+            if response.status_code >= 400:
+                continue
+            for kind, loc, lastmod in parse_sitemap(_open_stream(response)):
+                if kind == "sitemap":
+                    pending.append(loc)
+                else:
+                    yield loc, lastmod
+        except (ET.ParseError, OSError, EOFError):
+            # A broken sitemap only costs its own URLs; whatever parsed before the error is kept
+            continue
+        finally:
+            response.close()
+
+
+def sitemap_batches(start_url, robots_rules=None, batch_size=SEED_BATCH_SIZE, session=None):
+    """Same-host sitemap URLs for start_url in lists of (url, lastmod), for bulk frontier seeding."""
+    host = urlparse(start_url).netloc
+    batch = []
+    for url, lastmod in iter_sitemap_urls(sitemap_candidates(start_url, robots_rules), session=session):
+        if urlparse(url).netloc != host:
+            continue
+        batch.append((url, lastmod))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
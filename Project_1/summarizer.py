@@ -0,0 +1,237 @@
+import json
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from helpers import ai_analysis, call_gemini
+from hybrid_fetch import template_key
+
+# Rough token estimate for Gemini prompts (~4 characters per token)
+CHARS_PER_TOKEN = 4
+# Largest digest sent to the final client-report prompt
+FINAL_INPUT_TOKENS = 30_000
+# Largest batch of issue groups (or notes) summarized by one map/reduce call
+BATCH_INPUT_TOKENS = 8_000
+# Reduce levels before notes that still don't fit are truncated instead of merged again
+MAX_REDUCE_ROUNDS = 4
+EXAMPLE_URLS_PER_GROUP = 5
+MAX_PARALLEL_CALLS = 4
+
+THIN_CONTENT_WORDS = 300
+
+MAP_PROMPT = """You are an SEO analyst preparing notes for a final client audit report.
+Below are grouped technical SEO issues from a website crawl. Each group is one issue type on one page template, with the number of affected pages and example URLs.
+
+Write concise analyst notes (at most {max_words} words):
+- For each issue: scope (pages, templates), severity (High/Medium/Low), likely root cause, representative URLs.
+- Merge groups that clearly share a root cause (e.g. one template causing the same issue on many pages).
+- Plain bullet points, no preamble, no code blocks.
+
+[ISSUE_GROUPS]:
+{groups}
+"""
+
+REDUCE_PROMPT = """You are an SEO analyst. Merge the following partial audit notes from different parts of the same website into one set of concise notes (at most {max_words} words).
+Keep page counts, severities and representative URLs; combine duplicates; drop nothing important. Plain bullet points, no preamble, no code blocks.
+
+[PARTIAL_NOTES]:
+{notes}
+"""
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+# --- Condense: per-page report -> compact issue records ---
+def page_issues(report):
+    """Flatten one full_seo_audit report into (issue type, detail) pairs."""
+    if report.get("error"):
+        return [("page_error", report["error"][:200])]
+
+    issues = []
+    if report.get("title", {}).get("text") == "Missing":
+        issues.append(("missing_title", ""))
+    if report.get("description", {}).get("text") == "Missing":
+        issues.append(("missing_meta_description", ""))
+    if report.get("duplicate_title"):
+        issues.append(("duplicate_title", report.get("title", {}).get("text", "")[:80]))
+    if report.get("duplicate_meta_description"):
+        issues.append(("duplicate_meta_description", ""))
+    if report.get("duplicate_content"):
+        issues.append(("duplicate_content", ""))
+    if report.get("near_duplicate_of"):
+        issues.append(("near_duplicate_content", report["near_duplicate_of"][0]))
+    if not report.get("H1_content"):
+        issues.append(("missing_h1", ""))
+    if report.get("headings", {}).get("H1", 0) > 1:
+        issues.append(("multiple_h1", f"{report['headings']['H1']} H1s"))
+    if report.get("h1_title_duplicate"):
+        issues.append(("h1_same_as_title", ""))
+    total_words = report.get("word_stats", {}).get("total_words", 0)
+    if total_words < THIN_CONTENT_WORDS:
+        issues.append(("thin_content", f"{total_words} words"))
+    if report.get("word_stats", {}).get("anchor_ratio_percent", 0) > 15:
+        issues.append(("high_anchor_text_ratio", f"{report['word_stats']['anchor_ratio_percent']}%"))
+    if report.get("empty_anchor_text_links"):
+        issues.append(("empty_anchor_text_links", f"{report['empty_anchor_text_links']} links"))
+    if report.get("non_descriptive_anchors"):
+        issues.append(("non_descriptive_anchors", f"{report['non_descriptive_anchors']} links"))
+    images = report.get("images", {})
+    if images.get("images_without_alt"):
+        issues.append(("images_without_alt", f"{images['images_without_alt']} of {images.get('total_images', 0)}"))
+    if images.get("broken_images"):
+        issues.append(("broken_images", f"{len(images['broken_images'])} broken"))
+    if images.get("heavy_images"):
+        heaviest = max(images["heavy_images"], key=lambda i: i["bytes"])
+        issues.append(("heavy_images", f"{len(images['heavy_images'])} over 300 KB, largest {heaviest['bytes'] // 1024} KB"))
+    if report.get("internal_link_errors"):
+        errors = report["internal_link_errors"]
+        issues.append(("broken_internal_links", f"{len(errors)} e.g. {errors[0]['url']}"))
+    if report.get("http_links_on_https"):
+        issues.append(("http_links_on_https", f"{len(report['http_links_on_https'])} links"))
+    if not report.get("schema", {}).get("json_ld_found", False):
+        issues.append(("no_json_ld_schema", ""))
+    if report.get("text_to_html_ratio_percent", 100) < 10:
+        issues.append(("low_text_to_html_ratio", f"{report['text_to_html_ratio_percent']}%"))
+    if "noindex" in report.get("meta_robots", "").lower():
+        issues.append(("meta_noindex", report["meta_robots"]))
+    if report.get("robots_txt", {}).get("allows_this_page") is False:
+        issues.append(("blocked_by_robots_txt", ""))
+    if not report.get("https_info", {}).get("using_https", True):
+        issues.append(("not_https", ""))
+    return issues
+
+
+def group_issues(seo_data):
+    """Group issue records by (issue type, template) with counts and a few example URLs."""
+    groups = defaultdict(lambda: {"pages": 0, "examples": []})
+    for page in seo_data:
+        url = page.get("url", "")
+        report = page.get("report") or {"error": page.get("error", "unknown error")}
+        template = "/" + template_key(url)[1]
+        for issue, detail in page_issues(report):
+            group = groups[(issue, template)]
+            group["pages"] += 1
+            if len(group["examples"]) < EXAMPLE_URLS_PER_GROUP:
+                group["examples"].append(f"{url} {detail}".strip())
+    return sorted(
+        ({"issue": issue, "template": template, **group} for (issue, template), group in groups.items()),
+        key=lambda g: -g["pages"],
+    )
+
+
+def site_stats(seo_data, groups):
+    issue_pages = Counter()
+    for group in groups:
+        issue_pages[group["issue"]] += group["pages"]
+    return {
+        "pages_audited": len(seo_data),
+        "templates": len({g["template"] for g in groups}),
+        "pages_per_issue": dict(issue_pages.most_common()),
+    }
+
+
+# --- Token-budgeted batching ---
+def batch_by_budget(items, budget_tokens, render=json.dumps):
+    batches, current, used = [], [], 0
+    for item in items:
+        cost = estimate_tokens(render(item))
+        if current and used + cost > budget_tokens:
+            batches.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _run_parallel(prompts):
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_CALLS) as executor:
+        results = list(executor.map(call_gemini, prompts))
+    failed = [r for r in results if r.startswith("❌")]
+    if failed:
+        raise RuntimeError(failed[0])
+    return results
+
+
+def _notes_budget_words(batch_count):
+    # Leave room so all notes of one level fit the next prompt
+    return max(150, (FINAL_INPUT_TOKENS * 3 // 4) // max(batch_count, 1) // 2)
+
+
+def map_issue_groups(groups):
+    batches = batch_by_budget(groups, BATCH_INPUT_TOKENS)
+    max_words = _notes_budget_words(len(batches))
+    prompts = [
+        MAP_PROMPT.format(max_words=max_words, groups="\n".join(json.dumps(g) for g in batch))
+        for batch in batches
+    ]
+    return _run_parallel(prompts)
+
+
+def _truncate_notes(notes, budget_tokens):
+    share = max(budget_tokens // max(len(notes), 1), 1) * CHARS_PER_TOKEN
+    return [note if len(note) <= share else note[:share].rsplit("\n", 1)[0] + "\n[...]" for note in notes]
+
+
+def reduce_notes(notes):
+    """Merge notes level by level until they fit the final prompt budget.
+
+    Every call merges at least two notes, so each level shrinks the note count; after
+    MAX_REDUCE_ROUNDS levels whatever still doesn't fit is truncated.
+    """
+    budget = FINAL_INPUT_TOKENS // 2
+    for _ in range(MAX_REDUCE_ROUNDS):
+        if estimate_tokens("\n\n".join(notes)) <= budget or len(notes) <= 1:
+            return notes
+        batches = batch_by_budget(notes, BATCH_INPUT_TOKENS, render=str)
+        if len(batches) == len(notes):
+            # Every note alone fills a batch: pair them up rather than rewrite each one in place
+            batches = [notes[i:i + 2] for i in range(0, len(notes), 2)]
+        max_words = _notes_budget_words(len(batches))
+        prompts = [REDUCE_PROMPT.format(max_words=max_words, notes="\n\n---\n\n".join(b)) for b in batches]
+        notes = _run_parallel(prompts)
+    if estimate_tokens("\n\n".join(notes)) > budget:
+        notes = _truncate_notes(notes, budget)
+    return notes
+
+
+def _fit_groups(groups, budget_tokens):
+    fitted, used = [], 0
+    for group in groups:
+        cost = estimate_tokens(json.dumps(group))
+        if used + cost > budget_tokens:
+            break
+        fitted.append(group)
+        used += cost
+    return fitted
+
+
+# --- Pipeline ---
+def summarize_audit(seo_data):
+    """Client-ready AI summary of a crawl of any size.
+
+    Page reports are condensed into issue groups. Small sites go straight to the final
+    prompt; larger ones are summarized batch by batch in parallel (map), the notes are
+    merged until they fit (reduce), and the final prompt gets the notes plus the biggest
+    issue groups.
+    """
+    groups = group_issues(seo_data)
+    digest = {"site_stats": site_stats(seo_data, groups), "issue_groups": groups}
+    if estimate_tokens(json.dumps(digest)) <= FINAL_INPUT_TOKENS:
+        return ai_analysis(json.dumps(digest))
+
+    try:
+        notes = reduce_notes(map_issue_groups(groups))
+    except RuntimeError as e:
+        return str(e)
+
+    notes_text = "\n\n".join(notes)
+    remaining = FINAL_INPUT_TOKENS - estimate_tokens(notes_text) - estimate_tokens(json.dumps(digest["site_stats"]))
+    digest = {
+        "site_stats": digest["site_stats"],
+        "analyst_notes": notes_text,
+        "largest_issue_groups": _fit_groups(groups, max(remaining, 0)),
+    }
+    return ai_analysis(json.dumps(digest))
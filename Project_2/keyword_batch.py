@@ -0,0 +1,160 @@
+import csv
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from keyword_cache import prompt_hash
+from keyword_stream import JSONL_PROMPT, MODEL_NAME, REPAIR_PROMPT, normalize_keyword, rows_to_dataframe, stream_keyword_rows
+
+MAX_PARALLEL_CALLS = 4
+REQUESTS_PER_MINUTE = 30
+SEED_COLUMNS = ("seed", "seed keyword", "keyword")
+LOCATION_COLUMNS = ("location", "country", "market")
+# Cache version of the structured (JSON Lines) generation, shared with single-seed mode
+STRUCTURED_PROMPT_VERSION = prompt_hash(JSONL_PROMPT, REPAIR_PROMPT)
+
+
+# --- Input ---
+def read_seed_csv(data, default_location="India"):
+    """(seed, location) pairs from CSV bytes/text; the location column is optional."""
+    text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+    reader = csv.DictReader(io.StringIO(text))
+    columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+    seed_column = next((columns[c] for c in SEED_COLUMNS if c in columns), None)
+    if seed_column is None:
+        raise ValueError(f"CSV needs a seed column (one of: {', '.join(SEED_COLUMNS)})")
+    location_column = next((columns[c] for c in LOCATION_COLUMNS if c in columns), None)
+
+    pairs = []
+    for record in reader:
+        seed = (record.get(seed_column) or "").strip()
+        location = (record.get(location_column) or "").strip() if location_column else ""
+        if seed:
+            pairs.append((seed, location or default_location))
+    # Keep order, drop repeated pairs
+    return list(dict.fromkeys(pairs))
+
+
+# --- Rate Limiting ---
+class RequestRateLimiter:
+    """Spaces calls evenly so no more than requests_per_minute start in any minute."""
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE):
+        self.interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# --- Fan-out ---
+def _generate_pair(seed, location, limiter, cache, force_refresh):
+    hit = None if cache is None or force_refresh else cache.get(seed, location, MODEL_NAME, STRUCTURED_PROMPT_VERSION)
+    if hit and hit[1] is not None:
+        df = hit[1]
+    else:
+        # Only real Gemini calls count against the rate limit
+        limiter.wait()
+        rows = [row for batch in stream_keyword_rows(seed, location) for row in batch]
+        df = rows_to_dataframe(rows)
+        if cache is not None and rows:
+            cache.put(seed, location, MODEL_NAME, STRUCTURED_PROMPT_VERSION, frame=df)
+    df = df.copy()
+    df["Seed"] = seed
+    df["Location"] = location
+    return df
+
+
+def generate_batch(pairs, max_workers=MAX_PARALLEL_CALLS, requests_per_minute=REQUESTS_PER_MINUTE,
+                   cache=None, force_refresh=False):
+    """Yield ((seed, location), DataFrame or None, error or None) as each Gemini call finishes.
+
+    With a cache, pairs generated before are answered from it; force_refresh regenerates them.
+    """
+    limiter = RequestRateLimiter(requests_per_minute)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_generate_pair, seed, location, limiter, cache, force_refresh): (seed, location)
+                   for seed, location in pairs}
+        try:
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, str(e)
+        finally:
+            # Stop queued calls if the caller stops consuming (e.g. a Streamlit rerun)
+            for future in futures:
+                future.cancel()
+
+
+# --- Merge ---
+NORMALIZED_COLUMN = "Normalized Keyword"
+LABEL_COLUMNS = ("Seed", "Location")
+
+
+class KeywordMerger:
+    """Running merge of batch results: one row per normalized keyword, the highest-volume
+    variant, plus every seed/location that produced it and how many rows did (Sources).
+
+    Each frame is folded into what was kept so far, so merging a whole batch costs time in
+    proportion to its rows, not re-merging every earlier frame after each call.
+    """
+
+    def __init__(self):
+        self._best = None  # highest-volume row per normalized keyword, in first-seen order
+        self._columns = []
+        self._labels = {column: {} for column in LABEL_COLUMNS}  # column -> {normalized: "a, b"}
+        self._pairs = set()  # (column, normalized, value) already in a label
+        self._sources = {}
+
+    def add(self, frame):
+        if frame is None or frame.empty:
+            return
+        df = frame.assign(**{NORMALIZED_COLUMN: frame["Keyword"].map(normalize_keyword)})
+        df = df[df[NORMALIZED_COLUMN] != ""]
+        if df.empty:
+            return
+        self._columns += [c for c in frame.columns if c not in self._columns]
+
+        # Ties keep the row seen first, here and against earlier frames
+        top = df.loc[df.groupby(NORMALIZED_COLUMN, sort=False)["Search Volume"].idxmax()].set_index(NORMALIZED_COLUMN)
+        if self._best is None:
+            self._best = top
+        else:
+            positions = self._best.index.get_indexer(top.index)
+            known = positions >= 0
+            previous = self._best["Search Volume"].to_numpy()[positions[known]]
+            higher = top.index[known][top["Search Volume"].to_numpy()[known] > previous]
+            self._best.loc[higher, top.columns] = top.loc[higher]
+            self._best = pd.concat([self._best, top[~known]])
+
+        for column in LABEL_COLUMNS:
+            if column not in df.columns:
+                continue
+            labels = self._labels[column]
+            for key, value in df[[NORMALIZED_COLUMN, column]].drop_duplicates().itertuples(index=False):
+                if (column, key, value) not in self._pairs:
+                    self._pairs.add((column, key, value))
+                    labels[key] = f"{labels[key]}, {value}" if key in labels else str(value)
+        for key, count in df[NORMALIZED_COLUMN].value_counts(sort=False).items():
+            self._sources[key] = self._sources.get(key, 0) + count
+
+    def frame(self):
+        """The merged table so far, or None before any keyword arrived."""
+        if self._best is None:
+            return None
+        best = self._best.copy()
+        for column, labels in self._labels.items():
+            if column in best.columns:
+                best[column] = pd.Series(labels, dtype=object).reindex(best.index)
+        best["Sources"] = pd.Series(self._sources).reindex(best.index)
+        return best.rename_axis(NORMALIZED_COLUMN).reset_index()[self._columns + ["Sources", NORMALIZED_COLUMN]]
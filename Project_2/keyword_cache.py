@@ -0,0 +1,137 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from keyword_stream import normalize_keyword
+
+KEYWORD_CACHE_PATH = os.getenv("KEYWORD_CACHE_PATH", os.path.join(".keyword_cache", "keywords.sqlite"))
+# Generations older than this are regenerated; the store is trimmed (least recently used first) above the size cap
+KEYWORD_CACHE_TTL = float(os.getenv("KEYWORD_CACHE_TTL_HOURS", 7 * 24)) * 3600
+KEYWORD_CACHE_MAX_BYTES = int(float(os.getenv("KEYWORD_CACHE_MAX_MB", 200)) * 1024 * 1024)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    key TEXT PRIMARY KEY,
+    seed TEXT NOT NULL,
+    location TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    response TEXT,
+    frame BLOB,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_last_used ON generations (last_used);
+"""
+
+
+def prompt_hash(*templates):
+    """Short version id for the prompt template(s); editing a prompt invalidates its cached generations."""
+    digest = hashlib.sha256("\0".join(templates).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def cache_key(seed, location, model, prompt_version):
+    parts = [normalize_keyword(seed), " ".join(str(location).lower().split()), model, prompt_version]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def _dump_frame(df):
+    buffer = io.BytesIO()
+    df.to_pickle(buffer)
+    return buffer.getvalue()
+
+
+def _load_frame(blob):
+    # Only ever reads blobs this cache wrote itself
+    return pd.read_pickle(io.BytesIO(blob))
+
+
+class KeywordCache:
+    """Disk-backed cache (SQLite) of Gemini keyword generations.
+
+    Entries are keyed by normalized seed, location, model and prompt version and hold the
+    raw response text and/or the parsed DataFrame, so a repeat lookup costs no tokens.
+    Expired entries are dropped on read; writes trim the store back under max_bytes.
+    """
+
+    def __init__(self, path=KEYWORD_CACHE_PATH, ttl=KEYWORD_CACHE_TTL, max_bytes=KEYWORD_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Batch mode reads and writes from worker threads; every access goes through self._lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, seed, location, model, prompt_version):
+        """(response text, DataFrame) for a fresh entry, or None; either part may be None."""
+        key = cache_key(seed, location, model, prompt_version)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, frame, created FROM generations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[2] > self.ttl:
+                self._conn.execute("DELETE FROM generations WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE generations SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        response, frame, _ = row
+        return response, _load_frame(frame) if frame is not None else None
+
+    def put(self, seed, location, model, prompt_version, response=None, frame=None):
+        blob = _dump_frame(frame) if frame is not None else None
+        size = len(response or "") + len(blob or b"")
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key(seed, location, model, prompt_version), seed, location, model, prompt_version,
+                 response, blob, size, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM generations WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM generations").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM generations ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM generations WHERE key = ?", stale)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM generations")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM generations"
+            ).fetchone()
+        return {"entries": entries, "bytes": size}
+
+
+keyword_cache = KeywordCache()
@@ -0,0 +1,141 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from SimplerLLM.language.embeddings import EmbeddingsLLM, EmbeddingsProvider
+
+from keyword_stream import normalize_keyword
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBED_BATCH_SIZE = 1000
+EMBED_WORKERS = 4
+# text-embedding-3 vectors can be truncated and re-normalized; 512 dims keep 50k keywords at ~100 MB
+EMBED_DIMENSIONS = 512
+# Cosine similarity at or above which two keywords are treated as the same topic
+SIMILARITY_THRESHOLD = 0.86
+# Keywords matched against the cluster heads per matmul (BLOCK_SIZE x heads floats)
+BLOCK_SIZE = 512
+
+_embeddings = {}  # (model, normalized keyword) -> vector, reused across Streamlit reruns
+_embeddings_lock = threading.Lock()
+
+
+# --- Embedding ---
+def _embed_batch(llm, texts):
+    data = llm.generate_embeddings(texts)
+    # The API may return items out of order; each carries its input index
+    return [item.embedding for item in sorted(data, key=lambda item: item.index)]
+
+
+def embed_keywords(texts, embeddings_llm=None, model_name=EMBEDDING_MODEL, batch_size=EMBED_BATCH_SIZE,
+                   dimensions=EMBED_DIMENSIONS):
+    """Unit-length float32 embeddings (len(texts) x dimensions), fetched in concurrent batches.
+
+    Texts embedded earlier in this process are not sent again.
+    """
+    with _embeddings_lock:
+        missing = list(dict.fromkeys(t for t in texts if (model_name, t) not in _embeddings))
+    if missing:
+        llm = embeddings_llm or EmbeddingsLLM.create(provider=EmbeddingsProvider.OPENAI, model_name=model_name)
+        batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        with ThreadPoolExecutor(max_workers=EMBED_WORKERS) as executor:
+            for batch, vectors in zip(batches, executor.map(lambda b: _embed_batch(llm, b), batches)):
+                vectors = np.asarray(vectors, dtype=np.float32)[:, :dimensions]
+                with _embeddings_lock:
+                    _embeddings.update(zip(((model_name, t) for t in batch), vectors))
+
+    with _embeddings_lock:
+        matrix = np.stack([_embeddings[(model_name, t)] for t in texts]) if texts else np.zeros((0, dimensions), np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+# --- Grouping ---
+# Clustering is leader-based rather than connected components of the similarity graph.
+# Components are single-linkage: A~B and B~C chain A and C into one cluster however far
+# apart they are, and in a single-niche keyword set such chains build a few giant clusters
+# with meaningless heads. Here keywords are visited best first; each joins the most similar
+# existing head at or above the threshold, or becomes a head itself. Every member is then
+# within the threshold of its head, which bounds cluster diameter. The cost is order
+# dependence: a keyword may sit nearer another cluster's members than its own head.
+def leader_clusters(vectors, threshold=SIMILARITY_THRESHOLD, block_size=BLOCK_SIZE):
+    """Head index for each unit vector, with vectors given in priority order (best first).
+
+    Each block is matched against all heads so far in one matmul; only the keywords no head
+    claims are resolved one by one, against the few heads opened within the same block.
+    """
+    n = len(vectors)
+    labels = np.empty(n, dtype=np.int64)
+    heads = np.empty(n, dtype=np.int64)
+    head_count = 0
+    for start in range(0, n, block_size):
+        block = vectors[start:start + block_size]
+        unclaimed = np.arange(len(block))
+        if head_count:
+            sims = block @ vectors[heads[:head_count]].T
+            best = sims.argmax(axis=1)
+            claimed = sims[np.arange(len(block)), best] >= threshold
+            labels[start + np.flatnonzero(claimed)] = heads[best[claimed]]
+            unclaimed = np.flatnonzero(~claimed)
+
+        # Heads opened inside this block, compared through one small intra-block matrix
+        local = block[unclaimed] @ block[unclaimed].T
+        new_heads = []
+        for position, index in enumerate(unclaimed):
+            if new_heads:
+                row = local[position, new_heads]
+                nearest = int(row.argmax())
+                if row[nearest] >= threshold:
+                    labels[start + index] = labels[start + unclaimed[new_heads[nearest]]]
+                    continue
+            new_heads.append(position)
+            labels[start + index] = start + index
+            heads[head_count] = start + index
+            head_count += 1
+    return labels
+
+
+def cluster_keywords(df, threshold=SIMILARITY_THRESHOLD, embeddings_llm=None):
+    """Add Cluster, Cluster Head and Cluster Size columns to a keyword table.
+
+    Keywords are embedded once per normalized text and assigned to heads (see leader_clusters).
+    Heads are picked highest volume first (shortest on ties), so each cluster's head is its
+    highest-volume keyword; clusters are numbered by total volume.
+    """
+    df = df.copy()
+    normalized = df["Keyword"].map(normalize_keyword)
+    volume = pd.to_numeric(df["Search Volume"], errors="coerce").fillna(0)
+    ranked = df.assign(_normalized=normalized, _volume=volume, _length=df["Keyword"].str.len()).sort_values(
+        ["_volume", "_length"], ascending=[False, True]
+    )
+    # One entry per normalized text, best row first; its keyword names the cluster if it leads one
+    leaders = ranked.drop_duplicates("_normalized")
+    texts = leaders["_normalized"].tolist()
+    labels = leader_clusters(embed_keywords(texts, embeddings_llm), threshold)
+    df["Cluster"] = normalized.map(dict(zip(texts, labels))).to_numpy()
+
+    heads = pd.Series(leaders["Keyword"].to_numpy(), index=np.arange(len(texts)))
+    sizes = df.groupby("Cluster").size()
+    order = volume.groupby(df["Cluster"]).sum().sort_values(ascending=False).index
+    renumber = pd.Series(np.arange(1, len(order) + 1), index=order)
+
+    df["Cluster Head"] = df["Cluster"].map(heads)
+    df["Cluster Size"] = df["Cluster"].map(sizes)
+    df["Cluster"] = df["Cluster"].map(renumber)
+    return df
+
+
+def summarize_clusters(df, sample_size=5):
+    """One row per cluster: head term, size, total volume, mean difficulty and a few members."""
+    grouped = df.groupby("Cluster", sort=True)
+    summary = pd.DataFrame({
+        "Cluster Head": grouped["Cluster Head"].first(),
+        "Keywords": grouped.size(),
+        "Total Search Volume": grouped["Search Volume"].sum(),
+        "Avg SEO Difficulty": grouped["SEO Difficulty"].mean().round(1),
+        "Avg CPC (USD)": grouped["CPC (USD)"].mean().round(2),
+        "Members": grouped["Keyword"].agg(lambda k: ", ".join(k.head(sample_size))),
+    })
+    return summary.reset_index()
@@ -0,0 +1,153 @@
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+SCORE_COLUMN = "Opportunity Score"
+FEATURE_COLUMNS = {
+    "volume": "Search Volume",
+    "cpc": "CPC (USD)",
+    "seo_difficulty": "SEO Difficulty",
+    "paid_difficulty": "Paid Difficulty",
+}
+INTENT_COLUMN = "Search Intent"
+INTENTS = ("Informational", "Commercial", "Transactional", "Navigational")
+MAX_CACHED_FRAMES = 8
+MAX_CACHED_RANKINGS = 32
+
+
+@dataclass
+class ScoringWeights:
+    volume: float = 0.6
+    cpc: float = 0.0
+    seo_difficulty: float = 1.0   # weight of "easy to rank" (higher = easier keywords rank higher)
+    paid_difficulty: float = 1.0  # weight of "cheap to advertise"
+    # Search intent -> score multiplier; intents not listed count as 1.0
+    intents: Dict[str, float] = field(default_factory=dict)
+
+    def key(self):
+        return json.dumps(asdict(self), sort_keys=True)
+
+
+# --- Formulas ---
+# Each takes the cached feature arrays and the weights and returns one score per row.
+def classic_score(features, weights):
+    """The explorer's original formula: raw volume plus inverse difficulties (same values at default weights)."""
+    return (
+        features["volume"] * weights.volume
+        + weights.seo_difficulty * 100 / (features["seo_difficulty"] + 1)
+        + weights.paid_difficulty * 80 / (features["paid_difficulty"] + 1)
+        + features["cpc"] * weights.cpc
+    )
+
+
+def balanced_score(features, weights):
+    """0-100 weighted mix of log volume, CPC and ease, each scaled to 0-1, so no single column dominates."""
+    def scaled(values):
+        top = values.max() if len(values) else 0.0
+        return values / top if top > 0 else np.zeros_like(values)
+
+    parts = (
+        (weights.volume, scaled(np.log1p(features["volume"]))),
+        (weights.cpc, scaled(features["cpc"])),
+        (weights.seo_difficulty, (100 - np.clip(features["seo_difficulty"], 0, 100)) / 100),
+        (weights.paid_difficulty, (100 - np.clip(features["paid_difficulty"], 0, 100)) / 100),
+    )
+    total = sum(abs(w) for w, _ in parts)
+    if not total:
+        return np.zeros(len(features["volume"]))
+    return 100 * sum(w * values for w, values in parts) / total
+
+
+FORMULAS = {
+    "classic": classic_score,
+    "balanced": balanced_score,
+}
+
+
+# --- Cached features and rankings ---
+_features = OrderedDict()  # frame version -> feature arrays
+_rankings = OrderedDict()  # (frame version, formula, weights key) -> ranked DataFrame
+_lock = threading.Lock()
+
+
+def _remember(cache, key, value, limit):
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+    return value
+
+
+def _lookup(cache, key):
+    with _lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+
+def frame_version(df):
+    """Content hash of the columns scoring reads, so an edited or regenerated table is rescored.
+
+    Row order does not change the version: a re-ranked table maps to the same cache entries.
+    It is recomputed on every call (one vectorized hash pass), so a table edited in place
+    never gets the ranking of its old contents.
+    """
+    columns = [c for c in (*FEATURE_COLUMNS.values(), INTENT_COLUMN, "Keyword") if c in df.columns]
+    hashed = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    return f"{len(df)}:{','.join(columns)}:{int(hashed.sum(dtype=np.uint64))}"
+
+
+def prepare_features(df, version=None):
+    """Numeric feature arrays for df, converted once per table version."""
+    version = version or frame_version(df)
+    cached = _lookup(_features, version)
+    if cached is not None:
+        return cached
+    features = {
+        name: pd.to_numeric(df[column], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+        if column in df.columns else np.zeros(len(df))
+        for name, column in FEATURE_COLUMNS.items()
+    }
+    intents = df[INTENT_COLUMN].astype("string").str.strip().str.title() if INTENT_COLUMN in df.columns else None
+    features["intent"] = pd.Categorical(intents) if intents is not None else None
+    return _remember(_features, version, features, MAX_CACHED_FRAMES)
+
+
+def score(features, weights, formula="classic"):
+    values = FORMULAS[formula](features, weights)
+    intent = features["intent"]
+    if intent is not None and weights.intents:
+        multipliers = np.array([weights.intents.get(c, 1.0) for c in intent.categories] + [1.0])
+        values = values * multipliers[intent.codes]  # code -1 (missing intent) picks the trailing 1.0
+    return values
+
+
+def rank_keywords(df, weights=None, formula="classic"):
+    """df with an Opportunity Score column, best first.
+
+    Features are cached per table version and rankings per (version, formula, weights),
+    so switching back and forth between weightings does no work at all.
+    """
+    weights = weights or ScoringWeights()
+    version = frame_version(df)
+    key = (version, formula, weights.key())
+    cached = _lookup(_rankings, key)
+    if cached is not None:
+        return cached
+    values = score(prepare_features(df, version), weights, formula)
+    order = np.argsort(-values, kind="stable")
+    ranked = df.iloc[order].reset_index(drop=True)
+    ranked[SCORE_COLUMN] = values[order]
+    return _remember(_rankings, key, ranked, MAX_CACHED_RANKINGS)
+
+
+def score_keywords(df, weights=None, formula="classic"):
+    """Drop any previous score and rank the table (the default matches the original hard-coded formula)."""
+    return rank_keywords(df.drop(columns=[SCORE_COLUMN], errors="ignore"), weights, formula)
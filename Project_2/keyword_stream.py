@@ -0,0 +1,228 @@
+import json
+import re
+import unicodedata
+from dataclasses import asdict, dataclass, fields
+
+import google.generativeai as genai
+import pandas as pd
+
+MODEL_NAME = "gemini-2.0-flash"
+
+# --- Typed Schema ---
+INTENTS = {"informational": "Informational", "commercial": "Commercial", "transactional": "Transactional",
+           "navigational": "Navigational", "i": "Informational", "c": "Commercial", "t": "Transactional",
+           "n": "Navigational"}
+
+
+@dataclass
+class KeywordRow:
+    keyword: str
+    search_volume: int
+    cpc_usd: float
+    paid_difficulty: int
+    seo_difficulty: int
+    search_intent: str
+    serp_results: int
+
+
+# Dataclass field -> column name used by the keyword table (same as the markdown mode)
+COLUMNS = {
+    "keyword": "Keyword",
+    "search_volume": "Search Volume",
+    "cpc_usd": "CPC (USD)",
+    "paid_difficulty": "Paid Difficulty",
+    "seo_difficulty": "SEO Difficulty",
+    "search_intent": "Search Intent",
+    "serp_results": "Estimated SERP Results",
+}
+DTYPES = {
+    "Keyword": "string", "Search Volume": "int64", "CPC (USD)": "float64", "Paid Difficulty": "int16",
+    "SEO Difficulty": "int16", "Search Intent": "category", "Estimated SERP Results": "int64",
+}
+# Keys the model sometimes uses instead of the schema's
+ALIASES = {
+    "volume": "search_volume", "monthly_searches": "search_volume", "cpc": "cpc_usd",
+    "paid_kd": "paid_difficulty", "seo_kd": "seo_difficulty", "kd": "seo_difficulty",
+    "difficulty": "seo_difficulty", "intent": "search_intent", "serp": "serp_results",
+    "estimated_serp_results": "serp_results",
+}
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")  # all schema numbers are non-negative; "-" is a range
+_MULTIPLIERS = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}
+
+
+def _number(value):
+    """Parse 1200, "1,200", "$1.20", "1.2K" or "10-20" (midpoint) into a float."""
+    if isinstance(value, bool):
+        raise ValueError(f"not a number: {value!r}")
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().lower().replace(",", "")
+    matches = _NUMBER.findall(text)
+    if not matches:
+        raise ValueError(f"not a number: {value!r}")
+    number = sum(float(m) for m in matches[:2]) / min(len(matches), 2)
+    suffix = re.search(r"\d\s*([kmb])\b", text)
+    return number * _MULTIPLIERS[suffix.group(1)] if suffix else number
+
+
+def _key(name):
+    name = re.sub(r"[^a-z0-9]+", "_", str(name).lower()).strip("_")
+    return ALIASES.get(name, name)
+
+
+def normalize_keyword(text):
+    """Dedup key: case-, accent-, punctuation- and whitespace-insensitive keyword text."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def coerce_row(obj):
+    """Validate one model-produced object against the schema, fixing what can be fixed; ValueError otherwise."""
+    if not isinstance(obj, dict):
+        raise ValueError(f"expected an object, got {type(obj).__name__}")
+    data = {_key(k): v for k, v in obj.items()}
+    missing = [f.name for f in fields(KeywordRow) if f.name not in data and f.name != "serp_results"]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    keyword = " ".join(str(data["keyword"]).replace("**", "").split())
+    if not keyword:
+        raise ValueError("empty keyword")
+    intent = str(data["search_intent"]).strip()
+    return KeywordRow(
+        keyword=keyword,
+        search_volume=max(int(_number(data["search_volume"])), 0),
+        cpc_usd=round(max(_number(data["cpc_usd"]), 0.0), 2),
+        # Difficulties are 1-100 by contract
+        paid_difficulty=min(max(int(round(_number(data["paid_difficulty"]))), 1), 100),
+        seo_difficulty=min(max(int(round(_number(data["seo_difficulty"]))), 1), 100),
+        search_intent=INTENTS.get(intent.lower(), intent.title()),
+        serp_results=int(_number(data["serp_results"])) if data.get("serp_results") not in (None, "") else 0,
+    )
+
+
+def parse_line(line):
+    """One JSON Lines row -> KeywordRow, or None for blank/structural lines (fences, brackets)."""
+    text = line.strip()
+    if not text or text.startswith("```") or text in ("[", "]", "{", "}", "],", "},"):
+        return None
+    # Tolerate array-style output and trailing commas
+    text = text.lstrip("[").rstrip(",").rstrip("]").strip()
+    try:
+        obj = json.loads(text)
+    except json.JSONDecodeError:
+        obj = json.loads(_repair_json(text))
+    return coerce_row(obj)
+
+
+def _repair_json(text):
+    """Cheap local fixes for common model slips: single quotes, trailing commas, unquoted keys."""
+    if not text.startswith("{"):
+        text = "{" + text
+    if not text.endswith("}"):
+        text = text + "}"
+    text = re.sub(r",\s*}", "}", text)
+    text = re.sub(r"'([^'\"]*)'", r'"\1"', text)
+    text = re.sub(r"([{,]\s*)([A-Za-z_][A-Za-z0-9_ ]*)(\s*:)", r'\1"\2"\3', text)
+    return text
+
+
+# --- Incremental Parsing ---
+class StreamingRowParser:
+    """Turns streamed text chunks into KeywordRows as soon as each line is complete.
+
+    Lines that still fail after local repair are kept in bad_lines for a targeted re-ask.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self.bad_lines = []
+        self.seen = set()
+
+    def _parse(self, line):
+        try:
+            row = parse_line(line)
+        except ValueError:  # includes json.JSONDecodeError
+            self.bad_lines.append(line.strip())
+            return None
+        if row is None or row.keyword.lower() in self.seen:
+            return None
+        self.seen.add(row.keyword.lower())
+        return row
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        return [row for row in map(self._parse, lines) if row]
+
+    def close(self):
+        lines, self._buffer = [self._buffer], ""
+        return [row for row in map(self._parse, lines) if row]
+
+
+# --- Prompts ---
+JSONL_PROMPT = """
+You are an expert SEO strategist working for luxury fashion clients.
+
+Generate {count} highly relevant **non-branded** keywords.
+
+Seed keyword: "{seed_keyword}"
+Location: "{location}"
+
+- Only use generic, long-tail, informational, commercial, and LSI keywords.
+- Avoid brand names or trademarked terms.
+- Provide realistic estimated values:
+    - search_volume: monthly searches typical for each keyword (integer)
+    - cpc_usd: between 0.10 and 5.00 (number)
+    - paid_difficulty: between 1 and 100 (integer, not 0)
+    - seo_difficulty: between 1 and 100 (integer, not 0)
+    - search_intent: exactly one of "Informational", "Commercial", "Transactional"
+    - serp_results: estimated number of SERP results (integer)
+
+Output JSON Lines: exactly one JSON object per line, no markdown, no code fences, no commentary, sorted by keyword opportunity.
+Example line:
+{{"keyword": "...", "search_volume": 1200, "cpc_usd": 1.35, "paid_difficulty": 42, "seo_difficulty": 37, "search_intent": "Commercial", "serp_results": 1500000}}
+"""
+
+REPAIR_PROMPT = """The following lines were meant to be JSON objects with the keys
+keyword, search_volume, cpc_usd, paid_difficulty, seo_difficulty, search_intent, serp_results
+but are malformed. Return each one fixed as valid JSON, one object per line, same order, nothing else.
+Keep the original values; estimate any missing value realistically.
+
+{lines}
+"""
+
+
+# --- Gemini Calls ---
+def _model(model_name=MODEL_NAME):
+    return genai.GenerativeModel(model_name)
+
+
+def stream_keyword_rows(seed_keyword, location, count=100, model_name=MODEL_NAME, repair=True):
+    """Yield lists of new KeywordRows while Gemini streams its answer.
+
+    Rows that could not be parsed are re-asked in one small follow-up call at the end
+    instead of regenerating all keywords.
+    """
+    parser = StreamingRowParser()
+    prompt = JSONL_PROMPT.format(count=count, seed_keyword=seed_keyword, location=location)
+    for chunk in _model(model_name).generate_content(prompt, stream=True):
+        rows = parser.feed(chunk.text)
+        if rows:
+            yield rows
+    rows = parser.close()
+    if rows:
+        yield rows
+
+    if repair and parser.bad_lines:
+        bad_lines, parser.bad_lines = parser.bad_lines, []
+        response = _model(model_name).generate_content(REPAIR_PROMPT.format(lines="\n".join(bad_lines)))
+        rows = parser.feed(response.text + "\n")
+        if rows:
+            yield rows
+
+
+def rows_to_dataframe(rows):
+    """KeywordRows -> typed DataFrame with the keyword table's column names."""
+    df = pd.DataFrame([asdict(row) for row in rows], columns=list(COLUMNS)).rename(columns=COLUMNS)
+    return df.astype(DTYPES)
@@ -1,8 +1,17 @@
 import streamlit as st
 import pandas as pd
 import os
+import time
 import google.generativeai as genai
 from dotenv import load_dotenv
+from keyword_cache import keyword_cache, prompt_hash
+from keyword_clusters import SIMILARITY_THRESHOLD, cluster_keywords, summarize_clusters
+from keyword_scoring import FORMULAS, INTENTS, ScoringWeights, frame_version, rank_keywords, score_keywords
+from keyword_stream import MODEL_NAME, rows_to_dataframe, stream_keyword_rows
+from keyword_batch import (
+    MAX_PARALLEL_CALLS, REQUESTS_PER_MINUTE, STRUCTURED_PROMPT_VERSION, KeywordMerger, generate_batch,
+    read_seed_csv,
+)
 
 # Load environment variables
 load_dotenv()
@@ -13,12 +22,7 @@ if GEMINI_API_KEY:
 
 # ----------- Keyword Generation (Gemini) -----------
 
-def generate_keywords(seed_keyword, location):
-    if not GEMINI_API_KEY:
-        st.error("⚠️ Gemini API key not found.")
-        return None
-
-    prompt = f"""
+MARKDOWN_PROMPT = """
 You are an expert SEO strategist working for luxury fashion clients.
 
 Generate 100 highly relevant **non-branded** keywords.
@@ -40,9 +44,17 @@ Output as a markdown table sorted by keyword opportunity.
 Columns:
 | Keyword | Search Volume | CPC (USD) | Paid Difficulty | SEO Difficulty | Search Intent | Estimated SERP Results |
 """
+MARKDOWN_PROMPT_VERSION = prompt_hash(MARKDOWN_PROMPT)
+
+def generate_keywords(seed_keyword, location):
+    if not GEMINI_API_KEY:
+        st.error("⚠️ Gemini API key not found.")
+        return None
+
+    prompt = MARKDOWN_PROMPT.format(seed_keyword=seed_keyword, location=location)
 
     try:
-        model = genai.GenerativeModel("gemini-2.0-flash")
+        model = genai.GenerativeModel(MODEL_NAME)
         response = model.generate_content(prompt)
         return response.text
     except Exception as e:
@@ -85,29 +97,98 @@ def parse_response_to_dataframe(response_text):
             df["Search Intent"] = df["Search Intent"].map(lambda x: intent_map.get(x.strip(), x) if isinstance(x, str) else x)
 
         # Convert numeric columns
-        for col in ["Search Volume", "CPC (USD)", "Paid Difficulty", "SEO Difficulty"]:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+        numeric = ["Search Volume", "CPC (USD)", "Paid Difficulty", "SEO Difficulty"]
+        df[numeric] = df[numeric].apply(pd.to_numeric, errors="coerce").fillna(0)
+
+        return score_keywords(df)
+    except Exception as e:
+        st.error(f"Error parsing table: {e}")
+        return None
+
+def cached_markdown_keywords(seed_keyword, location, force_refresh=False):
+    """Markdown-mode keywords, served from the keyword cache unless force_refresh is set."""
+    if not force_refresh:
+        hit = keyword_cache.get(seed_keyword, location, MODEL_NAME, MARKDOWN_PROMPT_VERSION)
+        if hit and hit[1] is not None:
+            st.caption("♻️ Loaded from cache (no Gemini call).")
+            return hit[1]
 
-        # Calculate opportunity score
-        df["Opportunity Score"] = (
-            df["Search Volume"] * 0.6 +
-            (100 / (df["SEO Difficulty"] + 1)) +
-            (80 / (df["Paid Difficulty"] + 1))
-        )
+    response = generate_keywords(seed_keyword, location)
+    if not response:
+        return None
+    df = parse_response_to_dataframe(response)
+    if df is not None:
+        keyword_cache.put(seed_keyword, location, MODEL_NAME, MARKDOWN_PROMPT_VERSION, response=response, frame=df)
+    return df
 
-        # Sort by best keyword opportunity
-        df = df.sort_values(by="Opportunity Score", ascending=False).reset_index(drop=True)
+# ----------- Structured (JSON Lines) Generation -----------
+
+def generate_keywords_streaming(seed_keyword, location, table, force_refresh=False):
+    """Fill the table placeholder as rows stream in; returns the final DataFrame or None."""
+    if not force_refresh:
+        hit = keyword_cache.get(seed_keyword, location, MODEL_NAME, STRUCTURED_PROMPT_VERSION)
+        if hit and hit[1] is not None:
+            st.caption("♻️ Loaded from cache (no Gemini call).")
+            return score_keywords(hit[1])
+
+    if not GEMINI_API_KEY:
+        st.error("⚠️ Gemini API key not found.")
+        return None
 
-        return df
+    rows = []
+    try:
+        for new_rows in stream_keyword_rows(seed_keyword, location):
+            rows.extend(new_rows)
+            table.dataframe(rows_to_dataframe(rows), use_container_width=True)
     except Exception as e:
-        st.error(f"Error parsing table: {e}")
+        st.error(f"Error generating keywords: {str(e)}")
+        if not rows:
+            return None
+        st.warning(f"Keeping the {len(rows)} keywords received before the error.")
+
+    if not rows:
+        st.error("❌ The response did not contain any valid keyword rows.")
         return None
+    df = rows_to_dataframe(rows)
+    keyword_cache.put(seed_keyword, location, MODEL_NAME, STRUCTURED_PROMPT_VERSION, frame=df)
+    return score_keywords(df.copy())
 
-# ----------- Main App -----------
+# ----------- Batch Generation -----------
+# The merged table is redrawn at most this often while a batch runs (and once at the end)
+TABLE_REDRAW_SECONDS = 1.0
 
-def main():
-    st.title("👗 Fashion SEO Keyword Explorer (AI-Powered)")
 
+def generate_keywords_batch(pairs, max_workers, requests_per_minute, table, force_refresh=False):
+    """Run every seed/location pair concurrently, showing the merged table as each call completes."""
+    if not GEMINI_API_KEY:
+        st.error("⚠️ Gemini API key not found.")
+        return None
+
+    progress = st.progress(0.0, text=f"0 of {len(pairs)} seed/location pairs done")
+    merger, errors = KeywordMerger(), []
+    stale, last_redraw = False, 0.0
+    for done, ((seed, location), df, error) in enumerate(generate_batch(
+            pairs, max_workers, requests_per_minute, cache=keyword_cache, force_refresh=force_refresh), 1):
+        if error:
+            errors.append(f"{seed} / {location}: {error}")
+        else:
+            merger.add(df)
+            stale = True
+        if stale and time.monotonic() - last_redraw >= TABLE_REDRAW_SECONDS:
+            table.dataframe(merger.frame(), use_container_width=True)
+            stale, last_redraw = False, time.monotonic()
+        progress.progress(done / len(pairs), text=f"{done} of {len(pairs)} seed/location pairs done")
+
+    merged = merger.frame()
+    if stale:
+        table.dataframe(merged, use_container_width=True)
+
+    if errors:
+        with st.expander(f"⚠️ {len(errors)} pairs failed"):
+            st.write("\n".join(f"- {e}" for e in errors))
+    return score_keywords(merged) if merged is not None else None
+
+def render_single_seed():
     col1, col2 = st.columns([2, 1])
     with col1:
         seed_keyword = st.text_input("🔍 Seed Keyword", placeholder="e.g., designer lehenga")
@@ -116,22 +197,133 @@ def main():
         if location == "Custom":
             location = st.text_input("✏️ Enter Custom Location", placeholder="e.g., Dubai, London")
 
+    output_format = st.radio("Output format", ["Structured (streaming)", "Markdown table"], horizontal=True)
+    force_refresh = st.checkbox("♻️ Force refresh (ignore cached generations)")
+
     if st.button("🚀 Generate Keywords") and seed_keyword:
-        with st.spinner("Generating keyword suggestions..."):
-            response = generate_keywords(seed_keyword, location)
-            if response:
-                df = parse_response_to_dataframe(response)
+        if output_format == "Structured (streaming)":
+            table = st.empty()
+            with st.spinner("Generating keyword suggestions..."):
+                df = generate_keywords_streaming(seed_keyword, location, table, force_refresh)
+            table.empty()
+            if df is not None:
+                st.session_state["gemini_keywords"] = df
+        else:
+            with st.spinner("Generating keyword suggestions..."):
+                df = cached_markdown_keywords(seed_keyword, location, force_refresh)
                 if df is not None:
                     st.session_state["gemini_keywords"] = df
 
+def render_batch_mode():
+    st.caption("Upload a CSV with a `seed` column and an optional `location` column.")
+    uploaded = st.file_uploader("📄 Seeds CSV", type=["csv"])
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        default_location = st.text_input("Default location", value="India")
+    with col2:
+        max_workers = st.number_input("Parallel calls", min_value=1, max_value=16, value=MAX_PARALLEL_CALLS)
+    with col3:
+        requests_per_minute = st.number_input("Requests per minute", min_value=1, max_value=600, value=REQUESTS_PER_MINUTE)
+    force_refresh = st.checkbox("♻️ Force refresh (ignore cached generations)", key="batch_force_refresh")
+
+    if st.button("🚀 Generate Keywords for All Seeds") and uploaded is not None:
+        try:
+            pairs = read_seed_csv(uploaded.getvalue(), default_location.strip() or "India")
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            return
+        if not pairs:
+            st.warning("The CSV has no seeds.")
+            return
+        table = st.empty()
+        df = generate_keywords_batch(pairs, int(max_workers), int(requests_per_minute), table, force_refresh)
+        table.empty()
+        if df is not None:
+            st.session_state["gemini_keywords"] = df
+
+def render_clusters(df):
+    st.subheader("🧩 Topic Clusters")
+    threshold = st.slider("Similarity threshold", min_value=0.70, max_value=0.98, value=SIMILARITY_THRESHOLD, step=0.01,
+                          help="Keywords at least this similar (cosine of OpenAI embeddings) share a cluster.")
+    if st.button("🧩 Cluster Keywords"):
+        with st.spinner(f"Embedding and clustering {len(df)} keywords..."):
+            try:
+                st.session_state["keyword_clusters"] = (frame_version(df), cluster_keywords(df, threshold))
+            except Exception as e:
+                st.error(f"Error clustering keywords: {str(e)}")
+
+    # Only show clusters computed for the keyword table currently on screen
+    clusters = st.session_state.get("keyword_clusters")
+    if not clusters or clusters[0] != frame_version(df):
+        return
+    clustered = clusters[1]
+    summary = summarize_clusters(clustered)
+    st.caption(f"{len(clustered)} keywords in {len(summary)} clusters.")
+    st.dataframe(summary, use_container_width=True)
+
+    heads_only = st.checkbox("Show only cluster head terms")
+    table = clustered[clustered["Keyword"] == clustered["Cluster Head"]] if heads_only else clustered
+    st.dataframe(table, use_container_width=True)
+    st.download_button("📥 Download Clustered CSV", data=clustered.to_csv(index=False).encode("utf-8"),
+                       file_name="ai_keyword_clusters.csv")
+
+def render_scoring_controls():
+    """Formula and weights for the Opportunity Score; re-ranking is cached, so changes apply instantly."""
+    with st.expander("⚖️ Opportunity Score Weights"):
+        formula = st.selectbox("Formula", list(FORMULAS), help="classic: the original volume + inverse difficulty "
+                               "score. balanced: every factor scaled to 0-1 before weighting (0-100 score).")
+        defaults = ScoringWeights()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            volume = st.number_input("Search volume", min_value=0.0, value=defaults.volume, step=0.1)
+        with col2:
+            cpc = st.number_input("CPC", min_value=0.0, value=defaults.cpc, step=0.1)
+        with col3:
+            seo = st.number_input("SEO ease", min_value=0.0, value=defaults.seo_difficulty, step=0.1)
+        with col4:
+            paid = st.number_input("Paid ease", min_value=0.0, value=defaults.paid_difficulty, step=0.1)
+        st.caption("Search intent multipliers")
+        intent_columns = st.columns(len(INTENTS))
+        intents = {}
+        for column, intent in zip(intent_columns, INTENTS):
+            with column:
+                intents[intent] = st.number_input(intent, min_value=0.0, value=1.0, step=0.1)
+    weights = ScoringWeights(volume=volume, cpc=cpc, seo_difficulty=seo, paid_difficulty=paid,
+                             intents={k: v for k, v in intents.items() if v != 1.0})
+    return formula, weights
+
+# ----------- Main App -----------
+
+def render_cache_controls():
+    stats = keyword_cache.stats()
+    with st.expander(f"🗄️ Keyword cache: {stats['entries']} generations, {stats['bytes'] / (1024 * 1024):.1f} MB"):
+        st.caption("Generations are reused for the same seed, location, model and prompt instead of calling Gemini again.")
+        if st.button("🗑️ Clear keyword cache"):
+            keyword_cache.clear()
+            st.success("Keyword cache cleared.")
+
+def main():
+    st.title("👗 Fashion SEO Keyword Explorer (AI-Powered)")
+    render_cache_controls()
+
+    mode = st.radio("Mode", ["Single seed", "Batch (CSV)"], horizontal=True)
+    if mode == "Batch (CSV)":
+        render_batch_mode()
+    else:
+        render_single_seed()
+
     df = st.session_state.get("gemini_keywords")
 
     if df is not None:
+        formula, weights = render_scoring_controls()
+        df = rank_keywords(df, weights, formula)
         st.subheader("📊 Keyword Suggestions (Ranked by Opportunity Score)")
         st.dataframe(df, use_container_width=True)
 
         csv_data = df.to_csv(index=False).encode("utf-8")
         st.download_button("📥 Download CSV", data=csv_data, file_name="ai_keywords.csv")
 
+        render_clusters(df)
+
 if __name__ == "__main__":
     main()
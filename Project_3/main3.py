@@ -5,9 +5,8 @@ import pandas as pd
 from dotenv import load_dotenv
 import re
 import textstat
-import io
 import markdown2
-from xhtml2pdf import pisa
+from pdf_cache import pdf_cache
 from datetime import datetime
 from urllib.parse import urlparse
 
@@ -146,9 +145,10 @@ def extract_meta(text):
             meta_description.group(1).strip() if meta_description else "No description found")
 
 # ----- PDF BUILD -----
-def build_html_blog_pdf(meta_title: str, meta_description: str, blog_content: str) -> str:
+def build_html_blog_pdf(meta_title: str, meta_description: str, blog_content: str, date_str: str = None) -> str:
     blog_html = markdown2.markdown(blog_content, extras=["tables", "fenced-code-blocks"])
-    date_str = datetime.now().strftime("%Y-%m-%d %H:%M")
+    # A fixed date per blog version keeps the HTML (and its cached PDF) stable across reruns
+    date_str = date_str or datetime.now().strftime("%Y-%m-%d %H:%M")
 
     html = f"""
     <!DOCTYPE html>
@@ -177,11 +177,9 @@ def build_html_blog_pdf(meta_title: str, meta_description: str, blog_content: st
     """
     return html
 
-def convert_to_pdf(meta_title, meta_description, blog_content):
-    html = build_html_blog_pdf(meta_title, meta_description, blog_content)
-    result = io.BytesIO()
-    pisa.CreatePDF(io.StringIO(html), dest=result)
-    return result.getvalue()
+def convert_to_pdf(meta_title, meta_description, blog_content, date_str=None):
+    html = build_html_blog_pdf(meta_title, meta_description, blog_content, date_str)
+    return pdf_cache.render(html)
 
 # ----- STREAMLIT APP -----
 def main():
@@ -207,6 +205,7 @@ def main():
             optimized = optimize_existing_blog(st.session_state["raw_blog"], tone)
             optimized = ensure_heading_structure(optimized)
             st.session_state["current_blog"] = optimized
+            st.session_state["blog_generated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M")
 
     # Regenerate button after first output
     if st.session_state["raw_blog"] and st.session_state["current_blog"]:
@@ -215,6 +214,7 @@ def main():
                 optimized = optimize_existing_blog(st.session_state["raw_blog"], tone)
                 optimized = ensure_heading_structure(optimized)
                 st.session_state["current_blog"] = optimized
+                st.session_state["blog_generated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M")
 
     if st.session_state["current_blog"]:
         st.subheader("\U0001F4C4 Optimized Blog")
@@ -228,8 +228,17 @@ def main():
         st.download_button("\U0001F4C5 Download as TXT", st.session_state["current_blog"], "optimized_blog.txt")
 
         meta_title, meta_desc = extract_meta(st.session_state["current_blog"])
-        pdf_bytes = convert_to_pdf(meta_title, meta_desc, st.session_state["current_blog"])
-        st.download_button("\U0001F4C4 Download as PDF", pdf_bytes, file_name="optimized_blog.pdf", mime="application/pdf")
+        generated_at = st.session_state.get("blog_generated_at")
+        html = build_html_blog_pdf(meta_title, meta_desc, st.session_state["current_blog"], generated_at)
+        # Rendered in the background and cached by content; only waited on when requested
+        pdf_bytes = pdf_cache.get(html)
+        if pdf_bytes is None:
+            pdf_cache.prefetch(html)
+            if st.button("\U0001F4C4 Prepare PDF Download"):
+                with st.spinner("Building PDF..."):
+                    pdf_bytes = convert_to_pdf(meta_title, meta_desc, st.session_state["current_blog"], generated_at)
+        if pdf_bytes is not None:
+            st.download_button("\U0001F4C4 Download as PDF", pdf_bytes, file_name="optimized_blog.pdf", mime="application/pdf")
 
 if __name__ == "__main__":
     main()
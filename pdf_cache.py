@@ -0,0 +1,129 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from xhtml2pdf import pisa
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", ".pdf_cache")
+# The disk cache is trimmed (least recently used first, by file mtime) above either cap
+PDF_CACHE_MAX_FILES = int(os.getenv("PDF_CACHE_MAX_FILES", 200))
+PDF_CACHE_MAX_BYTES = int(float(os.getenv("PDF_CACHE_MAX_MB", 100)) * 1024 * 1024)
+
+
+def html_to_pdf(html: str) -> bytes:
+    result = io.BytesIO()
+    pisa.CreatePDF(io.StringIO(html), dest=result)
+    return result.getvalue()
+
+
+class PdfRenderCache:
+    """Content-addressed PDF cache shared by the Streamlit apps.
+
+    PDFs are keyed by a SHA-256 of their HTML, kept in a small in-memory LRU and on disk,
+    and rendered on a background thread so a rerun never blocks on xhtml2pdf. Writes trim
+    the disk cache back under max_disk_files and max_disk_bytes.
+    """
+
+    def __init__(self, render=html_to_pdf, cache_dir=PDF_CACHE_DIR, max_memory_items=32, max_workers=2,
+                 max_disk_files=PDF_CACHE_MAX_FILES, max_disk_bytes=PDF_CACHE_MAX_BYTES):
+        self.render_pdf = render
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_files = max_disk_files
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf")
+
+    @staticmethod
+    def key(html):
+        return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pdf") if self.cache_dir else None
+
+    def _remember(self, key, pdf):
+        with self._lock:
+            self._memory[key] = pdf
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def get(self, html):
+        """Cached PDF bytes for html, or None if it hasn't been rendered yet."""
+        key = self.key(html)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        path = self._disk_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                pdf = f.read()
+            # mtime doubles as last use, so eviction drops the PDFs nobody downloads
+            os.utime(path)
+        except OSError:
+            return None  # evicted meanwhile
+        self._remember(key, pdf)
+        return pdf
+
+    def _evict_disk(self):
+        files = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".pdf"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        count, total = len(files), sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if count <= self.max_disk_files and total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # another render thread got there first
+            count -= 1
+            total -= size
+
+    def _build(self, key, html):
+        try:
+            pdf = self.render_pdf(html)
+            self._remember(key, pdf)
+            path = self._disk_path(key)
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{path}.tmp{threading.get_ident()}"
+                with open(tmp_path, "wb") as f:
+                    f.write(pdf)
+                os.replace(tmp_path, path)
+                self._evict_disk()
+            return pdf
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def prefetch(self, html):
+        """Start rendering in the background (at most once per HTML) and return the future."""
+        key = self.key(html)
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            future = self._executor.submit(self._build, key, html)
+            self._pending[key] = future
+            return future
+
+    def render(self, html, timeout=None):
+        """PDF bytes for html, waiting for (or starting) the background render if needed."""
+        pdf = self.get(html)
+        if pdf is not None:
+            return pdf
+        return self.prefetch(html).result(timeout=timeout)
+
+
+pdf_cache = PdfRenderCache()